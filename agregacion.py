@@ -0,0 +1,187 @@
+"""Cubo de conteos fecha × empresa × destino × hora y las vistas derivadas."""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+COLUMNA_CANTIDAD = 'Cantidad'
+
+# Formas de combinar varios días en el modo de rango
+ESTADISTICAS = ('Suma', 'Promedio', 'Percentil')
+
+
+def etiqueta_hora(hora):
+    """Etiqueta de intervalo usada en tablas, p. ej. ``07:00 - 07:59``."""
+    return f"{str(int(hora)).zfill(2)}:00 - {str(int(hora)).zfill(2)}:59"
+
+# Las 24 etiquetas se arman una vez; las vistas las toman por posición
+ETIQUETAS_HORA = np.array([etiqueta_hora(h) for h in range(24)], dtype=object)
+
+def construir_cubo(df, columnas):
+    """Cuenta viajes por día, empresa, destino y hora.
+
+    El resultado tiene las columnas originales de fecha (normalizada al día),
+    empresa, destino y hora más ``Cantidad``; todas las vistas del dashboard
+    se obtienen de él sin volver a recorrer las filas.
+    """
+    fecha_col = columnas['fecha_col']
+    dias = df[fecha_col].dt.normalize()
+    cubo = df.groupby([dias, df[columnas['empresa_col']], df[columnas['destino_col']], df[columnas['hora_col']]],
+                      observed=True, sort=True).size()
+    return cubo.reset_index(name=COLUMNA_CANTIDAD)
+
+class IndiceDiario:
+    """Particiona un DataFrame por día calendario usando offsets precalculados.
+
+    El DataFrame se ordena por fecha una sola vez; cada día queda como un
+    rango contiguo de filas, así que seleccionar un día es un ``iloc`` y un
+    rango de días se resuelve con búsqueda binaria sobre las fechas.
+    """
+
+    def __init__(self, df, fecha_col):
+        if not df[fecha_col].is_monotonic_increasing:
+            df = df.sort_values(fecha_col, kind='stable')
+        self.df = df
+        dias = df[fecha_col].dt.normalize().to_numpy()
+        unicos, inicios = np.unique(dias, return_index=True)
+        self.fechas = [pd.Timestamp(dia).date() for dia in unicos]
+        self._limites = np.append(inicios, len(df))
+        self._posiciones = {fecha: i for i, fecha in enumerate(self.fechas)}
+
+    @property
+    def primera(self):
+        return self.fechas[0] if self.fechas else None
+
+    @property
+    def ultima(self):
+        return self.fechas[-1] if self.fechas else None
+
+    def dia(self, fecha):
+        """Filas de ``fecha`` (vacío si no hay datos ese día)."""
+        i = self._posiciones.get(fecha)
+        if i is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[self._limites[i]:self._limites[i + 1]]
+
+    def rango(self, desde, hasta):
+        """Filas entre ``desde`` y ``hasta``, ambos inclusive."""
+        i = bisect_left(self.fechas, desde)
+        j = bisect_right(self.fechas, hasta)
+        return self.df.iloc[self._limites[i]:self._limites[j]]
+
+class AgregadoDiario:
+    """Matrices día × destino × hora por empresa para combinar rangos de fechas.
+
+    Cada matriz se arma desde el cubo la primera vez que se consulta una
+    empresa y se guarda junto con sus sumas acumuladas por día, de modo que
+    la suma (y el promedio) de cualquier rango cuesta lo mismo sin importar
+    cuántos días abarque. Los percentiles se calculan sobre las matrices
+    diarias, nunca sobre las filas originales.
+    """
+
+    def __init__(self, indice, columnas):
+        self.indice = indice
+        self.columnas = columnas
+        self._dias = np.array(indice.fechas, dtype='datetime64[D]')
+        self._matrices = {}
+
+    def _matriz(self, empresa):
+        if empresa not in self._matrices:
+            cubo = self.indice.df
+            filas = cubo[cubo[self.columnas['empresa_col']] == empresa]
+            destinos, codigos = np.unique(filas[self.columnas['destino_col']].to_numpy(dtype=object),
+                                          return_inverse=True)
+            dias = np.searchsorted(self._dias, filas[self.columnas['fecha_col']].to_numpy().astype('datetime64[D]'))
+            horas = filas[self.columnas['hora_col']].to_numpy().astype(int)
+            conteos = np.zeros((len(self._dias), len(destinos), 24), dtype=np.int64)
+            np.add.at(conteos, (dias, codigos, horas), filas[COLUMNA_CANTIDAD].to_numpy())
+            acumulado = np.concatenate([np.zeros((1,) + conteos.shape[1:], dtype=np.int64),
+                                        conteos.cumsum(axis=0)])
+            self._matrices[empresa] = (list(destinos), conteos, acumulado)
+        return self._matrices[empresa]
+
+    def _limites(self, desde, hasta):
+        i = bisect_left(self.indice.fechas, desde)
+        return i, max(i, bisect_right(self.indice.fechas, hasta))
+
+    def _seleccion(self, nombres, destinos, hora_rango):
+        indices = [i for i, nombre in enumerate(nombres) if destinos is None or nombre in destinos]
+        return indices, np.arange(hora_rango[0], hora_rango[1] + 1)
+
+    def perfil(self, empresa, desde, hasta, estadistica='Suma', percentil=90, destinos=None, hora_rango=(0, 23)):
+        """Combina los días del rango en un perfil hora × destino.
+
+        Devuelve las mismas columnas que ``resumen_por_hora`` (sin celdas en
+        cero), por lo que sirve tanto para el gráfico como para
+        ``tabla_por_hora``.
+        """
+        hora_col = self.columnas['hora_col']
+        destino_col = self.columnas['destino_col']
+        nombres, conteos, acumulado = self._matriz(empresa)
+        i, j = self._limites(desde, hasta)
+        if estadistica == 'Percentil' and j > i:
+            valores = np.percentile(conteos[i:j], percentil, axis=0)
+        else:
+            valores = acumulado[j] - acumulado[i]
+            if estadistica == 'Promedio' and j > i:
+                valores = valores / (j - i)
+
+        sel_destinos, sel_horas = self._seleccion(nombres, destinos, hora_rango)
+        valores = valores[np.ix_(sel_destinos, sel_horas)]
+        pos_destino, pos_hora = np.nonzero(valores)
+        orden = np.lexsort((pos_destino, pos_hora))
+        pos_destino, pos_hora = pos_destino[orden], pos_hora[orden]
+        return pd.DataFrame({
+            hora_col: sel_horas[pos_hora],
+            destino_col: [nombres[sel_destinos[k]] for k in pos_destino],
+            COLUMNA_CANTIDAD: valores[pos_destino, pos_hora],
+        })
+
+    def por_dia(self, empresa, desde, hasta, destinos=None, hora_rango=(0, 23)):
+        """Total por hora de cada día del rango, para superponer una línea por día."""
+        hora_col = self.columnas['hora_col']
+        fecha_col = self.columnas['fecha_col']
+        nombres, conteos, _ = self._matriz(empresa)
+        i, j = self._limites(desde, hasta)
+        sel_destinos, sel_horas = self._seleccion(nombres, destinos, hora_rango)
+        valores = conteos[i:j][:, sel_destinos][:, :, sel_horas].sum(axis=1)
+        pos_dia, pos_hora = np.nonzero(valores)
+        return pd.DataFrame({
+            fecha_col: [str(self.indice.fechas[i + k]) for k in pos_dia],
+            hora_col: sel_horas[pos_hora],
+            COLUMNA_CANTIDAD: valores[pos_dia, pos_hora],
+        })
+
+def filtrar_cubo(cubo, columnas, fecha=None, destinos=None, empresas=None, hora_rango=None):
+    """Filtra el cubo; los criterios en ``None`` no se aplican."""
+    mascara = pd.Series(True, index=cubo.index)
+    if fecha is not None:
+        mascara &= cubo[columnas['fecha_col']] == pd.Timestamp(fecha)
+    if destinos is not None:
+        mascara &= cubo[columnas['destino_col']].isin(destinos)
+    if empresas is not None:
+        mascara &= cubo[columnas['empresa_col']].isin(empresas)
+    if hora_rango is not None:
+        hora = cubo[columnas['hora_col']]
+        mascara &= (hora >= hora_rango[0]) & (hora <= hora_rango[1])
+    return cubo[mascara]
+
+def resumen_por_hora(cubo, columnas):
+    """Conteo por hora y destino, con el formato que espera ``px.line``."""
+    hora_col = columnas['hora_col']
+    destino_col = columnas['destino_col']
+    resumen = cubo.groupby([hora_col, destino_col], observed=True)[COLUMNA_CANTIDAD].sum()
+    return resumen.reset_index()
+
+def tabla_por_hora(cubo, columnas, hora_rango):
+    """Tabla hora × destino con todas las horas del rango y fila ``TOTAL``."""
+    tabla = pd.pivot_table(cubo, index=columnas['hora_col'], columns=columnas['destino_col'],
+                           values=COLUMNA_CANTIDAD, aggfunc='sum', fill_value=0, observed=True)
+    tabla.index = pd.Index(ETIQUETAS_HORA[tabla.index.to_numpy(dtype=int)], name='Hora Intervalo')
+
+    # Reindexar para mostrar todas las horas del rango seleccionado
+    tabla = tabla.reindex(ETIQUETAS_HORA[hora_rango[0]:hora_rango[1] + 1], fill_value=0)
+
+    sumatoria = pd.DataFrame(tabla.sum(axis=0)).T
+    sumatoria.index = ['TOTAL']
+    return pd.concat([tabla, sumatoria])
@@ -0,0 +1,224 @@
+"""Almacenamiento persistente en SQLite de viajes cargados y registros manuales."""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from agregacion import COLUMNA_CANTIDAD, AgregadoDiario, IndiceDiario
+from ingesta import CacheLRU, ResultadoCarga, mismo_prefijo, tamano_dataframe
+
+RUTA_BD = os.environ.get("DASHBOARD_DB_PATH", str(Path(__file__).parent / "dashboard.db"))
+
+# Nombres de columna del cubo cuando los datos vienen de la base y no de un Excel
+COLUMNAS_BD = {'fecha_col': 'Fecha', 'destino_col': 'Destino', 'empresa_col': 'Empresa', 'hora_col': 'Hora'}
+
+TAMANO_LOTE = 50_000
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    hash TEXT PRIMARY KEY,
+    nombre TEXT,
+    filas INTEGER NOT NULL,
+    cargado_en TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    huellas TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_archivos_nombre ON archivos (nombre);
+CREATE TABLE IF NOT EXISTS viajes (
+    id INTEGER PRIMARY KEY,
+    archivo_hash TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    empresa TEXT NOT NULL,
+    destino TEXT NOT NULL,
+    hora INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_viajes_fecha_empresa_destino_hora
+    ON viajes (fecha, empresa, destino, hora);
+CREATE INDEX IF NOT EXISTS idx_viajes_archivo_fecha ON viajes (archivo_hash, fecha);
+CREATE TABLE IF NOT EXISTS registros_manuales (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    abc_seguridad TEXT NOT NULL,
+    tiempo_salar TEXT NOT NULL,
+    tiempo_angamos TEXT NOT NULL,
+    creado_en TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_registros_manuales_fecha ON registros_manuales (fecha);
+"""
+
+_RUTAS_INICIALIZADAS = set()
+
+
+def _migrar(con):
+    """Agrega a una base existente las columnas que el esquema incorporó después."""
+    columnas = {fila[1] for fila in con.execute("PRAGMA table_info(archivos)")}
+    if 'huellas' not in columnas:
+        con.execute("ALTER TABLE archivos ADD COLUMN huellas TEXT")
+
+def conectar(ruta=RUTA_BD):
+    """Abre una conexión en modo WAL, creando el esquema la primera vez.
+
+    WAL permite que el dashboard lea mientras otra sesión está insertando.
+    """
+    con = sqlite3.connect(ruta, timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    if ruta not in _RUTAS_INICIALIZADAS:
+        con.executescript(ESQUEMA)
+        with con:
+            _migrar(con)
+        _RUTAS_INICIALIZADAS.add(ruta)
+    return con
+
+
+# --- VIAJES ---
+
+def _filas_viajes(df, columnas, archivo_hash):
+    fechas = df[columnas['fecha_col']].dt.strftime('%Y-%m-%d')
+    return zip([archivo_hash] * len(df), fechas,
+               df[columnas['empresa_col']].astype(str), df[columnas['destino_col']].astype(str),
+               df[columnas['hora_col']].astype(int).tolist())
+
+def _insertar_por_lotes(con, filas):
+    while True:
+        lote = [fila for _, fila in zip(range(TAMANO_LOTE), filas)]
+        if not lote:
+            break
+        con.executemany("INSERT INTO viajes (archivo_hash, fecha, empresa, destino, hora) "
+                        "VALUES (?, ?, ?, ?, ?)", lote)
+
+def _registrar_archivo(con, df, archivo_hash, nombre):
+    """Registra el archivo; devuelve ``False`` si ese contenido ya estaba guardado."""
+    huellas = df.attrs.get('huellas_dia')
+    cursor = con.execute("INSERT OR IGNORE INTO archivos (hash, nombre, filas, huellas) VALUES (?, ?, ?, ?)",
+                         (archivo_hash, nombre, len(df), None if huellas is None else json.dumps(huellas)))
+    return cursor.rowcount > 0
+
+def guardar_viajes(df, columnas, archivo_hash, nombre=None, ruta=RUTA_BD):
+    """Inserta los viajes de un archivo limpio; devuelve las filas insertadas.
+
+    Un archivo ya guardado (mismo hash de contenido) no se vuelve a insertar y
+    devuelve 0. La inserción es por lotes con ``executemany`` dentro de una
+    única transacción, así que un archivo queda guardado completo o no queda.
+    """
+    with closing(conectar(ruta)) as con, con:
+        if not _registrar_archivo(con, df, archivo_hash, nombre):
+            return 0
+        _insertar_por_lotes(con, _filas_viajes(df, columnas, archivo_hash))
+    return len(df)
+
+def _version_anterior(con, df, columnas, archivo_hash, nombre):
+    """``(hash, corte)`` de la versión guardada de ``nombre`` que ``df`` continúa, o ``None``.
+
+    Exige iguales huellas y viajes por día antes del corte y no menos viajes en él.
+    """
+    huellas = df.attrs.get('huellas_dia')
+    if huellas is None:
+        return None
+    por_dia = df[columnas['fecha_col']].dt.strftime('%Y-%m-%d').value_counts().to_dict()
+    candidatas = con.execute(
+        "SELECT hash, huellas FROM archivos WHERE nombre = ? AND hash != ? AND huellas IS NOT NULL "
+        "AND EXISTS (SELECT 1 FROM viajes WHERE archivo_hash = archivos.hash) ORDER BY rowid DESC",
+        (nombre, archivo_hash)).fetchall()
+    for hash_previo, huellas_previas in candidatas:
+        guardados = dict(con.execute("SELECT fecha, COUNT(*) FROM viajes WHERE archivo_hash = ? GROUP BY fecha",
+                                     (hash_previo,)).fetchall())
+        corte = max(guardados)
+        if (mismo_prefijo(json.loads(huellas_previas), huellas, corte)
+                and {dia: n for dia, n in por_dia.items() if dia < corte} ==
+                    {dia: n for dia, n in guardados.items() if dia < corte}
+                and por_dia.get(corte, 0) >= guardados[corte]):
+            return hash_previo, corte
+    return None
+
+def guardar_viajes_incremental(df, columnas, archivo_hash, nombre, ruta=RUTA_BD):
+    """Guarda una nueva versión de un archivo que crece día a día; devuelve las filas insertadas.
+
+    Si continúa una versión guardada (``_version_anterior``) solo se reemplaza
+    desde su último día; si no, equivale a ``guardar_viajes``.
+    """
+    with closing(conectar(ruta)) as con, con:
+        if not _registrar_archivo(con, df, archivo_hash, nombre):
+            return 0
+        anterior = _version_anterior(con, df, columnas, archivo_hash, nombre)
+        if anterior is not None:
+            hash_previo, corte = anterior
+            con.execute("UPDATE viajes SET archivo_hash = ? WHERE archivo_hash = ? AND fecha < ?",
+                        (archivo_hash, hash_previo, corte))
+            con.execute("DELETE FROM viajes WHERE archivo_hash = ?", (hash_previo,))
+            df = df[df[columnas['fecha_col']] >= pd.Timestamp(corte)]
+        _insertar_por_lotes(con, _filas_viajes(df, columnas, archivo_hash))
+    return len(df)
+
+def version_datos(ruta=RUTA_BD):
+    """Identificador que cambia cada vez que se insertan o eliminan viajes."""
+    with closing(conectar(ruta)) as con:
+        return con.execute("SELECT (SELECT COUNT(*) FROM archivos), (SELECT MAX(id) FROM viajes)").fetchone()
+
+def consultar_cubo(desde=None, hasta=None, ruta=RUTA_BD):
+    """Conteos por día, empresa, destino y hora calculados en SQL.
+
+    El resultado tiene el mismo formato que ``agregacion.construir_cubo`` con
+    los nombres de ``COLUMNAS_BD``. El índice compuesto permite resolver el
+    filtro de fechas y el ``GROUP BY`` sin ordenar.
+    """
+    condiciones = []
+    parametros = []
+    if desde is not None:
+        condiciones.append("fecha >= ?")
+        parametros.append(str(desde))
+    if hasta is not None:
+        condiciones.append("fecha <= ?")
+        parametros.append(str(hasta))
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    consulta = (f"SELECT fecha, empresa, destino, hora, COUNT(*) FROM viajes {where} "
+                "GROUP BY fecha, empresa, destino, hora ORDER BY fecha, empresa, destino, hora")
+    with closing(conectar(ruta)) as con:
+        filas = con.execute(consulta, parametros).fetchall()
+
+    nombres = [COLUMNAS_BD['fecha_col'], COLUMNAS_BD['empresa_col'], COLUMNAS_BD['destino_col'],
+               COLUMNAS_BD['hora_col'], COLUMNA_CANTIDAD]
+    cubo = pd.DataFrame(filas, columns=nombres)
+    cubo[COLUMNAS_BD['fecha_col']] = pd.to_datetime(cubo[COLUMNAS_BD['fecha_col']], format='%Y-%m-%d')
+    for clave in ('empresa_col', 'destino_col'):
+        cubo[COLUMNAS_BD[clave]] = cubo[COLUMNAS_BD[clave]].astype('category')
+    return cubo
+
+
+CACHE_BD = CacheLRU(max_entradas=2)
+
+def cargar_desde_bd(ruta=RUTA_BD, cache=CACHE_BD):
+    """Arma un ``ResultadoCarga`` con todo el historial guardado en la base.
+
+    El cubo se vuelve a consultar solo cuando cambia ``version_datos``.
+    """
+    inicio = time.perf_counter()
+    clave = (ruta, version_datos(ruta))
+    resultado = cache.obtener(clave)
+    origen = 'memoria'
+    if resultado is None:
+        cubo = consultar_cubo(ruta=ruta)
+        indice = IndiceDiario(cubo, COLUMNAS_BD['fecha_col'])
+        resultado = (None, COLUMNAS_BD, cubo, indice, AgregadoDiario(indice, COLUMNAS_BD))
+        cache.guardar(clave, resultado, tamano_dataframe(cubo))
+        origen = 'sqlite'
+    return ResultadoCarga(*resultado, origen, time.perf_counter() - inicio)
+
+
+# --- REGISTROS MANUALES ---
+
+def guardar_registro_manual(fecha, abc_seguridad, tiempo_salar, tiempo_angamos, ruta=RUTA_BD):
+    """Guarda un registro del formulario de ingreso manual."""
+    with closing(conectar(ruta)) as con, con:
+        con.execute("INSERT INTO registros_manuales (fecha, abc_seguridad, tiempo_salar, tiempo_angamos) "
+                    "VALUES (?, ?, ?, ?)", (str(fecha), abc_seguridad, tiempo_salar, tiempo_angamos))
+
+def registros_manuales(limite=50, ruta=RUTA_BD):
+    """Últimos registros manuales, del más reciente al más antiguo."""
+    with closing(conectar(ruta)) as con:
+        return pd.read_sql_query(
+            "SELECT fecha, abc_seguridad, tiempo_salar, tiempo_angamos, creado_en "
+            "FROM registros_manuales ORDER BY id DESC LIMIT ?", con, params=(limite,))
@@ -1,50 +1,24 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-from PIL import Image
-from fpdf import FPDF
 import tempfile
 import os
+import sqlite3
 from pathlib import Path
 
-# Configuración global
-pio.templates.default = "plotly"
-COLOR_PALETTE = px.colors.qualitative.Plotly
-
-# Función de normalización robusta de nombres de empresa
-def normalizar_nombre_empresa(nombre):
-    nombre = str(nombre).strip().upper()
-    nombre = nombre.replace('.', '').replace('&', 'AND')
-    nombre = ' '.join(nombre.split())  # Normaliza espacios múltiples
-    equivalencias = {
-        "JORQUERA TRANSPORTE S A": "JORQUERA TRANSPORTE S. A.",
-        "MINING SERVICES AND DERIVATES": "M S & D SPA",
-        "MINING SERVICES AND DERIVATES SPA": "M S & D SPA",
-        "M S AND D": "M S & D SPA",
-        "M S AND D SPA": "M S & D SPA",
-        "MSANDD SPA": "M S & D SPA",
-        "M S D": "M S & D SPA",
-        "M S D SPA": "M S & D SPA",
-        "M S & D": "M S & D SPA",
-        "M S & D SPA": "M S & D SPA",
-        "MS&D SPA": "M S & D SPA",
-        "M AND Q SPA": "M&Q SPA",
-        "M AND Q": "M&Q SPA",
-        "M Q SPA": "M&Q SPA",
-        "MQ SPA": "M&Q SPA",
-        "M&Q SPA": "M&Q SPA",
-        "MANDQ SPA": "M&Q SPA",
-        "MINING AND QUARRYING SPA": "M&Q SPA",
-        "MINING AND QUARRYNG SPA": "M&Q SPA",
-        "AG SERVICE SPA": "AG SERVICES SPA",
-        "AG SERVICES SPA": "AG SERVICES SPA",
-        "COSEDUCAM S A": "COSEDUCAM S A"
-    }
-    return equivalencias.get(nombre, nombre)
+import almacen
+import ingesta
+import motor
+from instrumentacion import MEDIDOR, tramo
+from normalizacion import normalizar_nombre_empresa
 
 # Configuración de la página
 st.set_page_config(page_title="Dashboard Equipos por Hora", layout="wide")
+
+# Tiempos por etapa; cProfile también con DASHBOARD_PERFIL=<ruta.prof>
+modo_depuracion = st.sidebar.checkbox("🛠️ Modo depuración", value=False)
+perfilar = modo_depuracion and st.sidebar.checkbox("Perfilar con cProfile", value=False)
+MEDIDOR.iniciar_ejecucion(memoria=modo_depuracion, perfilar=perfilar)
+
 CURRENT_DIR = Path(__file__).parent
 LOGOS = {
     "COSEDUCAM S A": str(CURRENT_DIR / "coseducam.png"),
@@ -58,44 +32,48 @@ BANNER_PATH = str(CURRENT_DIR / "image.png")
 # Título
 st.title("📊 Dashboard: Equipos por Hora, Empresa, Fecha y Destino")
 
-# Cargar archivo Excel (.xlsx o .xlsm)
-uploaded_file = st.file_uploader("📂 Carga tu archivo Excel (.xlsx o .xlsm)", type=["xlsx", "xlsm"])
+# Cargar archivos Excel (.xlsx o .xlsm)
+uploaded_files = st.file_uploader("📂 Carga tus archivos Excel (.xlsx o .xlsm)", type=["xlsx", "xlsm"],
+                                  accept_multiple_files=True)
+todas_las_hojas = st.checkbox("📑 Leer todas las hojas de cada archivo", value=False)
+guardar_historial = st.checkbox("💾 Guardar los viajes cargados en el historial", value=False)
 
 # Inicializar dataframe
 df = None
 
-if uploaded_file:
+if uploaded_files:
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-            tmp.write(uploaded_file.getbuffer())
-            tmp_path = tmp.name
-
-        df = pd.read_excel(tmp_path, engine='openpyxl')
-        required_columns = {
-            'fecha_col': 0,     # Columna A
-            'destino_col': 3,   # Columna D
-            'empresa_col': 11,  # Columna L
-            'hora_col': 14      # Columna O
-        }
-
-        if len(df.columns) < max(required_columns.values()) + 1:
-            st.error("❌ El archivo Excel no tiene el formato esperado.")
-            st.stop()
-
-        fecha_col = df.columns[required_columns['fecha_col']]
-        destino_col = df.columns[required_columns['destino_col']]
-        empresa_col = df.columns[required_columns['empresa_col']]
-        hora_col = df.columns[required_columns['hora_col']]
-
-        df = df.dropna(subset=[fecha_col, destino_col, empresa_col, hora_col])
-
-        # Procesar fechas y horas
-        df[fecha_col] = pd.to_datetime(df[fecha_col], errors='coerce', dayfirst=True)
-        df[hora_col] = pd.to_datetime(df[hora_col], format='%H:%M:%S', errors='coerce').dt.hour
-
-        # Normalizar empresas
-        df[empresa_col] = df[empresa_col].apply(normalizar_nombre_empresa)
-
+        archivos = [(f.name, f.getvalue()) for f in uploaded_files]
+        with tramo("app: carga"):
+            carga, detalles = ingesta.cargar_varios_excel(archivos, todas_las_hojas=todas_las_hojas)
+        for d in detalles:
+            if d.error:
+                st.warning(f"⚠️ No se pudo cargar {d.archivo}{f' [{d.hoja}]' if d.hoja else ''}: {d.error}")
+        with st.expander("📄 Detalle de carga por archivo"):
+            st.dataframe(pd.DataFrame(detalles, columns=ingesta.DetalleParte._fields).drop(columns='clave'),
+                         use_container_width=True)
+        df = carga.df
+        fecha_col = carga.columnas['fecha_col']
+        destino_col = carga.columnas['destino_col']
+        empresa_col = carga.columnas['empresa_col']
+        hora_col = carga.columnas['hora_col']
+        st.caption(f"⏱️ Datos cargados desde {carga.origen} en {carga.segundos:.2f} s")
+        aviso = ingesta.aviso_descartadas(df)
+        if aviso:
+            st.warning(f"⚠️ {aviso}")
+        # Cada archivo u hoja se guarda con su propio hash, así no se duplica si ya estaba guardado
+        if guardar_historial:
+            try:
+                insertadas = sum(almacen.guardar_viajes(df_parte, carga.columnas, d.clave, d.archivo)
+                                 for d, df_parte in ingesta.partes_carga(carga, detalles))
+            except sqlite3.Error as e:
+                st.warning(f"⚠️ No se pudieron guardar los viajes en el historial: {e}")
+            else:
+                if insertadas:
+                    st.caption(f"💾 {insertadas} viajes guardados en el historial.")
+
+    except ingesta.ErrorIngesta as e:
+        st.error(f"❌ {e}")
     except Exception as e:
         st.error(f"🚫 Error al procesar el archivo: {e}")
 else:
@@ -119,8 +97,17 @@ with st.form("manual_form"):
         elif not tiempo_angamos or ":" not in tiempo_angamos:
             st.error("⚠️ Formato incorrecto en Tiempo Angamos. Usa HH:MM.")
         else:
-            st.success("✅ Datos guardados correctamente.")
-            # Aquí puedes guardar en SQLite o CSV si quieres almacenamiento persistente
+            try:
+                almacen.guardar_registro_manual(fecha, abc_seguridad, tiempo_salar, tiempo_angamos)
+                st.success("✅ Datos guardados correctamente.")
+            except Exception as e:
+                st.error(f"🚫 Error al guardar el registro: {e}")
+
+with st.expander("📋 Últimos registros manuales"):
+    try:
+        st.dataframe(almacen.registros_manuales(), use_container_width=True)
+    except sqlite3.Error as e:
+        st.warning(f"⚠️ No se pudo leer el historial de registros: {e}")
 
 # Mostrar dashboard si hay datos cargados
 if df is not None and not df.empty:
@@ -128,22 +115,23 @@ if df is not None and not df.empty:
     if len(fechas_disponibles) == 0:
         st.warning("No se encontraron fechas válidas.")
     else:
-        fecha_sel = st.date_input(
-            "📅 Selecciona la fecha:",
-            min_value=min(fechas_disponibles),
-            max_value=max(fechas_disponibles),
-            value=min(fechas_disponibles)
-        )
-        df_filtrado = df[df[fecha_col].dt.date == fecha_sel]
-        destinos = sorted(df_filtrado[destino_col].dropna().unique())
-        destinos_sel = st.multiselect("📍 Selecciona destino(s):", destinos, default=list(destinos))
-        empresas = sorted(df_filtrado[empresa_col].dropna().unique())
-        empresas_sel = st.multiselect("🏭 Selecciona empresa(s):", empresas, default=list(empresas))
-
-        df_filtrado = df_filtrado[
-            df_filtrado[destino_col].isin(destinos_sel) &
-            df_filtrado[empresa_col].isin(empresas_sel)
-        ]
+        with tramo("app: filtros"):
+            fecha_sel = st.date_input(
+                "📅 Selecciona la fecha:",
+                min_value=min(fechas_disponibles),
+                max_value=max(fechas_disponibles),
+                value=min(fechas_disponibles)
+            )
+            df_filtrado = df[df[fecha_col].dt.date == fecha_sel]
+            destinos = sorted(df_filtrado[destino_col].dropna().unique())
+            destinos_sel = st.multiselect("📍 Selecciona destino(s):", destinos, default=list(destinos))
+            empresas = sorted(df_filtrado[empresa_col].dropna().unique())
+            empresas_sel = st.multiselect("🏭 Selecciona empresa(s):", empresas, default=list(empresas))
+
+            df_filtrado = df_filtrado[
+                df_filtrado[destino_col].isin(destinos_sel) &
+                df_filtrado[empresa_col].isin(empresas_sel)
+            ]
 
         if not df_filtrado.empty:
             horas = df_filtrado[hora_col].dropna().unique()
@@ -169,43 +157,49 @@ if df is not None and not df.empty:
                     except Exception as e:
                         st.warning(f"Error al cargar imágenes: {str(e)}")
 
-                    df_empresa = df_filtrado[df_filtrado[empresa_col] == empresa_normalizada]
-                    resumen = df_empresa.groupby([hora_col, destino_col]).size().reset_index(name='Cantidad')
-
-                    if not resumen.empty:
-                        destinos_unicos = resumen[destino_col].unique()
-                        color_map = {dest: COLOR_PALETTE[i % len(COLOR_PALETTE)] for i, dest in enumerate(destinos_unicos)}
-                        fig = px.line(
-                            resumen,
-                            x=hora_col,
-                            y="Cantidad",
-                            color=destino_col,
-                            markers=True,
-                            labels={
-                                hora_col: "Hora de Entrada",
-                                "Cantidad": "Cantidad de Equipos",
-                                destino_col: "Destino"
-                            },
-                            color_discrete_map=color_map
-                        )
-                        fig.update_layout(
-                            xaxis=dict(dtick=1),
-                            title=f"Cantidad de equipos por hora - {empresa}"
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.info("No hay datos para los filtros seleccionados.")
+                    with tramo("app: gráfico"):
+                        df_empresa = df_filtrado[df_filtrado[empresa_col] == empresa_normalizada]
+                        resumen = df_empresa.groupby([hora_col, destino_col], observed=True).size().reset_index(name='Cantidad')
+
+                        if not resumen.empty:
+                            # Plotly se importa recién al dibujar el primer gráfico
+                            px = motor.plotly_express()
+                            paleta = px.colors.qualitative.Plotly
+                            destinos_unicos = resumen[destino_col].unique()
+                            color_map = {dest: paleta[i % len(paleta)] for i, dest in enumerate(destinos_unicos)}
+                            fig = px.line(
+                                resumen,
+                                x=hora_col,
+                                y="Cantidad",
+                                color=destino_col,
+                                markers=True,
+                                labels={
+                                    hora_col: "Hora de Entrada",
+                                    "Cantidad": "Cantidad de Equipos",
+                                    destino_col: "Destino"
+                                },
+                                color_discrete_map=color_map
+                            )
+                            fig.update_layout(
+                                xaxis=dict(dtick=1),
+                                title=f"Cantidad de equipos por hora - {empresa}"
+                            )
+                            st.plotly_chart(fig, use_container_width=True)
+                        else:
+                            st.info("No hay datos para los filtros seleccionados.")
 
                 with col2:
-                    tabla = pd.pivot_table(
-                        df_empresa,
-                        index=df_empresa[hora_col],
-                        columns=destino_col,
-                        values=empresa_col,
-                        aggfunc='count',
-                        fill_value=0
-                    )
-                    st.dataframe(tabla.style.format(na_rep="0", precision=0))
+                    with tramo("app: tabla"):
+                        tabla = pd.pivot_table(
+                            df_empresa,
+                            index=df_empresa[hora_col],
+                            columns=destino_col,
+                            values=empresa_col,
+                            aggfunc='count',
+                            fill_value=0,
+                            observed=True
+                        )
+                        st.dataframe(tabla.style.format(na_rep="0", precision=0))
 
                 st.markdown("---")
                 st.subheader(f"📄 Descargar PDF para {empresa}")
@@ -242,3 +236,18 @@ if df is not None and not df.empty:
 
 else:
     st.info("📁 Carga un archivo Excel para comenzar.")
+
+# Panel de depuración (al final para reflejar el trabajo de esta ejecución)
+MEDIDOR.terminar_ejecucion()
+if modo_depuracion:
+    with st.sidebar.expander("⏱️ Tiempos por etapa", expanded=True):
+        st.dataframe(pd.DataFrame(MEDIDOR.estadisticas()), hide_index=True)
+        memoria = MEDIDOR.memoria()
+        if memoria:
+            st.caption(f"Memoria pico: {memoria['pico_ultima_mb']} MB (p95 {memoria['pico_p95_mb']} MB)")
+        st.download_button("Exportar tiempos (JSON)", MEDIDOR.exportar_json(),
+                           file_name="tiempos_app.json", mime="application/json")
+    if MEDIDOR.ultimo_perfil is not None:
+        with st.sidebar.expander("cProfile (última ejecución perfilada)"):
+            st.code(MEDIDOR.ultimo_perfil_texto)
+            st.download_button("Descargar .prof", MEDIDOR.ultimo_perfil, file_name="app.prof")
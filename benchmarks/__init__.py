@@ -0,0 +1 @@
+"""Benchmarks reproducibles del dashboard (ejecutar desde la raíz del repo)."""
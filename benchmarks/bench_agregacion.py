@@ -0,0 +1,84 @@
+"""Compara el groupby/pivot por empresa con las vistas derivadas del cubo.
+
+Además de medir tiempos verifica que gráfico y tabla sean idénticos a los
+que producía el cálculo fila a fila.
+
+Uso: python -m benchmarks.bench_agregacion --filas 100000,1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import agregacion
+import ingesta
+from benchmarks.sintetico import generar_dataframe
+
+
+def vistas_originales(df, columnas, fecha, empresas, hora_rango):
+    """Cálculo previo de ``dashboard.py``: filtro de filas, groupby y pivot por empresa."""
+    fecha_col = columnas['fecha_col']
+    destino_col = columnas['destino_col']
+    empresa_col = columnas['empresa_col']
+    hora_col = columnas['hora_col']
+
+    df_filtrado = df[df[fecha_col].dt.date == fecha].copy()
+    df_filtrado = df_filtrado[(df_filtrado[hora_col] >= hora_rango[0]) & (df_filtrado[hora_col] <= hora_rango[1])]
+    df_filtrado['Hora Intervalo'] = df_filtrado[hora_col].apply(lambda h: f"{str(int(h)).zfill(2)}:00 - {str(int(h)).zfill(2)}:59")
+
+    vistas = {}
+    for empresa in empresas:
+        df_empresa = df_filtrado[df_filtrado[empresa_col] == empresa]
+        resumen = df_empresa.groupby([hora_col, destino_col], observed=True).size().reset_index(name='Cantidad')
+        tabla = pd.pivot_table(df_empresa, index='Hora Intervalo', columns=destino_col,
+                               values=empresa_col, aggfunc='count', fill_value=0, observed=True)
+        horas_labels = [f"{str(h).zfill(2)}:00 - {str(h).zfill(2)}:59" for h in range(hora_rango[0], hora_rango[1] + 1)]
+        tabla = tabla.reindex(horas_labels, fill_value=0)
+        sumatoria = pd.DataFrame(tabla.sum(axis=0)).T
+        sumatoria.index = ['TOTAL']
+        vistas[empresa] = (resumen, pd.concat([tabla, sumatoria]))
+    return vistas
+
+def vistas_cubo(cubo, columnas, fecha, empresas, hora_rango):
+    """Mismas vistas obtenidas desde el cubo precalculado."""
+    cubo_filtrado = agregacion.filtrar_cubo(cubo, columnas, fecha=fecha, hora_rango=hora_rango)
+    vistas = {}
+    for empresa in empresas:
+        cubo_empresa = cubo_filtrado[cubo_filtrado[columnas['empresa_col']] == empresa]
+        vistas[empresa] = (agregacion.resumen_por_hora(cubo_empresa, columnas),
+                           agregacion.tabla_por_hora(cubo_empresa, columnas, hora_rango))
+    return vistas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", default="100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'celdas cubo':>12} {'cubo s':>8} {'original s':>11} {'desde cubo s':>13}")
+    for filas in (int(f) for f in args.filas.split(",")):
+        df, columnas = ingesta.limpiar_dataframe(generar_dataframe(filas))
+
+        inicio = time.perf_counter()
+        cubo = agregacion.construir_cubo(df, columnas)
+        t_cubo = time.perf_counter() - inicio
+
+        fecha = df[columnas['fecha_col']].dt.date.min()
+        empresas = sorted(df[columnas['empresa_col']].unique())
+        hora_rango = (6, 20)
+
+        inicio = time.perf_counter()
+        esperado = vistas_originales(df, columnas, fecha, empresas, hora_rango)
+        t_original = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtenido = vistas_cubo(cubo, columnas, fecha, empresas, hora_rango)
+        t_desde_cubo = time.perf_counter() - inicio
+
+        for empresa in empresas:
+            pd.testing.assert_frame_equal(esperado[empresa][0], obtenido[empresa][0])
+            pd.testing.assert_frame_equal(esperado[empresa][1], obtenido[empresa][1])
+        print(f"{filas:>10} {len(cubo):>12} {t_cubo:>8.3f} {t_original:>11.3f} {t_desde_cubo:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Tiempo de arranque del script de Streamlit medido con ``python -X importtime``.
+
+Ejecuta el script en un proceso nuevo (modo "bare" de Streamlit, sin
+archivo cargado), que es lo que paga cada reinicio del contenedor antes de
+la primera pintura. Informa el tiempo total, el de imports y los módulos
+más pesados, e indica si se cargó alguna dependencia que debería ser
+diferida (Plotly Express, Pillow, FPDF, Kaleido).
+
+Uso: python -m benchmarks.bench_arranque --scripts dashboard.py,app.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Solo deben importarse al dibujar un gráfico o generar un PDF
+DIFERIDOS = ("plotly.express", "PIL.Image", "fpdf", "kaleido")
+
+
+def _importtime(stderr):
+    """``{modulo: (propio_us, acumulado_us, nivel)}`` a partir de la salida de ``-X importtime``."""
+    modulos = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        modulos[nombre.strip()] = (int(propio), int(acumulado), nivel)
+    return modulos
+
+def medir_arranque(script, repeticiones=3, top=10):
+    """Arranca ``script`` ``repeticiones`` veces y resume la mediana."""
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    totales = []
+    imports = []
+    modulos = {}
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, "-X", "importtime", str(RAIZ / script)], cwd=RAIZ, env=env,
+                                 capture_output=True, text=True)
+        totales.append(time.perf_counter() - inicio)
+        modulos = _importtime(proceso.stderr)
+        imports.append(sum(acumulado for _, acumulado, nivel in modulos.values() if nivel == 0) / 1e6)
+    raices = sorted(((nombre, acumulado) for nombre, (_, acumulado, nivel) in modulos.items() if nivel == 0),
+                    key=lambda par: par[1], reverse=True)
+    return {
+        "script": script,
+        "total_s": statistics.median(totales),
+        "imports_s": statistics.median(imports),
+        "muestras_total_s": totales,
+        "modulos_mas_pesados_ms": {nombre: round(acumulado / 1000, 1) for nombre, acumulado in raices[:top]},
+        "diferidos_cargados": [nombre for nombre in DIFERIDOS if nombre in modulos],
+    }
+
+def imprimir(resultado):
+    print(f"{resultado['script']}: total {resultado['total_s']:.2f} s, imports {resultado['imports_s']:.2f} s")
+    for nombre, ms in resultado["modulos_mas_pesados_ms"].items():
+        print(f"  {nombre:<40} {ms:>8.1f} ms")
+    if resultado["diferidos_cargados"]:
+        print(f"  cargados al arrancar (deberían ser diferidos): {', '.join(resultado['diferidos_cargados'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scripts", default="dashboard.py,app.py")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="Guarda los resultados en JSON")
+    args = parser.parse_args()
+
+    resultados = [medir_arranque(script, args.repeticiones) for script in args.scripts.split(",")]
+    for resultado in resultados:
+        imprimir(resultado)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compara el parseo de horas anterior (``astype(str)`` + ``pd.to_datetime``) con ``extraer_horas``.
+
+Columnas de un solo tipo y una mezcla (``datetime.time``, fracciones de día
+de Excel, textos ``HH:MM`` y ``HH:MM:SS`` y basura). Verifica que las horas
+obtenidas sean las esperadas y cuenta las filas no reconocidas por cada
+método. También compara las etiquetas de intervalo armadas fila a fila
+con las que toma ``agregacion.tabla_por_hora`` de ``ETIQUETAS_HORA``.
+
+Uso: python -m benchmarks.bench_horas --filas 100000,1000000
+"""
+import argparse
+import datetime as dt
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregacion
+import ingesta
+
+BASURA = ["sin hora", "25:00", "--", "s/i"]
+
+
+def parseo_anterior(serie):
+    return pd.to_datetime(serie.astype(str), errors='coerce').dt.hour
+
+def columna(tipo, horas, minutos, segundos, rng):
+    """Valores de ``tipo`` para las horas dadas; ``mixta`` reparte los tipos al azar."""
+    if tipo == "time":
+        return [dt.time(h, m, s) for h, m, s in zip(horas, minutos, segundos)]
+    if tipo == "fraccion excel":
+        return list((horas * 3600 + minutos * 60 + segundos) / 86400)
+    if tipo == "texto HH:MM":
+        return [f"{h:02d}:{m:02d}" for h, m in zip(horas, minutos)]
+    if tipo == "texto HH:MM:SS":
+        return [f"{h}:{m:02d}:{s:02d}" for h, m, s in zip(horas, minutos, segundos)]
+    partes = {t: columna(t, horas, minutos, segundos, rng)
+              for t in ("time", "fraccion excel", "texto HH:MM", "texto HH:MM:SS")}
+    elegido = rng.choice(5, size=len(horas), p=[0.4, 0.3, 0.15, 0.1, 0.05])
+    nombres = list(partes)
+    return [partes[nombres[e]][i] if e < 4 else BASURA[i % len(BASURA)] for i, e in enumerate(elegido)]
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", default="100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} {'tipo':>15} {'anterior s':>11} {'nuevo s':>9} {'acel.':>7} "
+          f"{'no rec. ant.':>13} {'no rec. nuevo':>14}")
+    for filas in (int(f) for f in args.filas.split(",")):
+        rng = np.random.default_rng(0)
+        horas = rng.integers(0, 24, filas)
+        minutos = rng.integers(0, 60, filas)
+        segundos = rng.integers(0, 60, filas)
+        for tipo in ("time", "fraccion excel", "texto HH:MM", "texto HH:MM:SS", "mixta"):
+            serie = pd.Series(columna(tipo, horas, minutos, segundos, rng), dtype=object)
+            t_anterior, anterior = cronometrar(parseo_anterior, serie)
+            t_nuevo, nuevo = cronometrar(ingesta.extraer_horas, serie)
+
+            basura = serie.isin(BASURA).to_numpy()
+            np.testing.assert_array_equal(nuevo.to_numpy()[~basura], horas[~basura])
+            assert nuevo[basura].isna().all()
+            print(f"{filas:>9} {tipo:>15} {t_anterior:>11.3f} {t_nuevo:>9.3f} {t_anterior / t_nuevo:>6.0f}x "
+                  f"{int(anterior.isna().sum()):>13} {int(nuevo.isna().sum()):>14}")
+
+        serie_horas = pd.Series(horas)
+        t_lambda, esperado = cronometrar(
+            lambda s: s.apply(lambda h: f"{str(int(h)).zfill(2)}:00 - {str(int(h)).zfill(2)}:59"), serie_horas)
+        t_etiquetas, obtenido = cronometrar(lambda s: agregacion.ETIQUETAS_HORA[s.to_numpy(dtype=int)], serie_horas)
+        assert (obtenido == esperado.to_numpy()).all()
+        print(f"{filas:>9} {'etiquetas':>15} {t_lambda:>11.3f} {t_etiquetas:>9.3f} "
+              f"{t_lambda / t_etiquetas:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compara ``pd.read_excel`` con el lector streaming de ``ingesta``.
+
+Uso: python -m benchmarks.bench_lectura --filas 10000,100000,1000000
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+
+import ingesta
+from benchmarks.sintetico import generar_libro
+
+
+def lectura_completa(contenido):
+    df = pd.read_excel(io.BytesIO(contenido))
+    return df, ingesta.resolver_columnas(df)
+
+def lectura_streaming(contenido):
+    return ingesta.leer_excel_streaming(contenido)
+
+def medir(funcion, contenido):
+    """Devuelve (segundos, pico_mb) de una ejecución de ``funcion``."""
+    inicio = time.perf_counter()
+    funcion(contenido)
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcion(contenido)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", default="10000,100000,1000000",
+                        help="Tamaños de libro separados por coma")
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'lector':>10} {'segundos':>10} {'pico MB':>10}")
+    for filas in (int(f) for f in args.filas.split(",")):
+        contenido = generar_libro(filas)
+        for nombre, funcion in (("completa", lectura_completa), ("streaming", lectura_streaming)):
+            segundos, pico = medir(funcion, contenido)
+            print(f"{filas:>10} {nombre:>10} {segundos:>10.2f} {pico:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compara ``Series.apply`` fila a fila con la normalización sobre valores únicos.
+
+Uso: python -m benchmarks.bench_normalizacion --filas 100000,1000000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+import normalizacion
+from benchmarks.sintetico import VARIANTES_DESTINO, VARIANTES_EMPRESA
+
+
+def apply_original(serie, funcion):
+    """Ruta anterior: la función sin memoizar aplicada a cada fila."""
+    return serie.apply(funcion.__wrapped__)
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", default="100000,1000000")
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    print(f"{'filas':>10} {'columna':>8} {'apply s':>10} {'único s':>10} {'aceleración':>12}")
+    for filas in (int(f) for f in args.filas.split(",")):
+        casos = (
+            ("empresa", sum(VARIANTES_EMPRESA.values(), []), normalizacion.normalizar_nombre_empresa,
+             normalizacion.normalizar_empresas),
+            ("destino", sum(VARIANTES_DESTINO.values(), []), normalizacion.normalizar_destino,
+             normalizacion.normalizar_destinos),
+        )
+        for nombre, variantes, escalar, vectorizada in casos:
+            serie = pd.Series([rnd.choice(variantes) for _ in range(filas)], dtype=object)
+            t_apply, esperado = cronometrar(apply_original, serie, escalar)
+            t_unico, obtenido = cronometrar(vectorizada, serie)
+            assert obtenido.astype(object).equals(esperado.astype(object))
+            print(f"{filas:>10} {nombre:>8} {t_apply:>10.3f} {t_unico:>10.3f} {t_apply / t_unico:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
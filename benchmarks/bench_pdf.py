@@ -0,0 +1,61 @@
+"""Compara la generación serial y en paralelo de los PDF de las empresas de ``LOGOS``.
+
+Uso: python -m benchmarks.bench_pdf --filas 50000 --procesos 5
+"""
+import argparse
+import os
+import time
+
+import plotly.express as px
+
+import agregacion
+import ingesta
+import reportes
+from benchmarks.sintetico import generar_dataframe
+
+
+def armar_tareas(filas):
+    """Una tarea por empresa de ``LOGOS`` con logo disponible, para el primer día."""
+    df, columnas = ingesta.limpiar_dataframe(generar_dataframe(filas))
+    cubo = agregacion.construir_cubo(df, columnas)
+    indice = agregacion.IndiceDiario(cubo, columnas['fecha_col'])
+    cubo_dia = indice.dia(indice.primera)
+    hora_rango = (0, 23)
+
+    tareas = []
+    for empresa, logo_path in reportes.LOGOS.items():
+        if not os.path.exists(logo_path):
+            continue
+        cubo_empresa = cubo_dia[cubo_dia[columnas['empresa_col']] == empresa]
+        resumen = agregacion.resumen_por_hora(cubo_empresa, columnas)
+        fig = px.line(resumen, x=columnas['hora_col'], y="Cantidad", color=columnas['destino_col'],
+                      markers=True, title=f"Equipos por hora - {empresa}")
+        tareas.append(dict(empresa=empresa, etiqueta_fecha=str(indice.primera), fig=fig,
+                           tabla_final=agregacion.tabla_por_hora(cubo_empresa, columnas, hora_rango),
+                           logo_path=logo_path))
+    return tareas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=50000)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    tareas = armar_tareas(args.filas)
+
+    inicio = time.perf_counter()
+    for tarea in tareas:
+        reportes.generar_pdf(**tarea)
+    t_serial = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    pdfs, errores = reportes.generar_pdfs_en_paralelo(tareas, max_procesos=args.procesos)
+    t_paralelo = time.perf_counter() - inicio
+    assert not errores, errores
+
+    print(f"{'empresas':>9} {'serial s':>9} {'paralelo s':>11} {'aceleración':>12}")
+    print(f"{len(tareas):>9} {t_serial:>9.2f} {t_paralelo:>11.2f} {t_serial / t_paralelo:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
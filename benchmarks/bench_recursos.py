@@ -0,0 +1,97 @@
+"""Tiempo por reporte antes y después de preprocesar banner y logos.
+
+El gráfico se renderiza una vez y se reutiliza en ambas variantes, de modo
+que la diferencia corresponde solo a la composición de imágenes y al PDF.
+
+Uso: python -m benchmarks.bench_recursos --repeticiones 10
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image
+from fpdf import FPDF
+
+import reportes
+from benchmarks.bench_pdf import armar_tareas
+
+
+def composicion_anterior(grafico_png, banner_path, logo_path):
+    """Flujo previo: reabre y escala banner/logo y pasa por ``comb.png`` en disco."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        images_to_stack = []
+        base_width = 1800
+        if banner_path and os.path.exists(banner_path):
+            b_img = Image.open(banner_path).convert('RGB')
+            w_perc = base_width / float(b_img.size[0])
+            b_img = b_img.resize((base_width, int(b_img.size[1] * w_perc)), Image.Resampling.LANCZOS)
+            images_to_stack.append(b_img)
+        if logo_path and os.path.exists(logo_path):
+            l_img = Image.open(logo_path).convert('RGBA')
+            l_perc = 250 / float(l_img.size[0])
+            l_img = l_img.resize((250, int(l_img.size[1] * l_perc)), Image.Resampling.LANCZOS)
+            l_canvas = Image.new('RGB', (base_width, l_img.height + 60), (255, 255, 255))
+            l_canvas.paste(l_img, (60, 30), mask=l_img)
+            images_to_stack.append(l_canvas)
+        grafico_path = os.path.join(tmpdir, "graf.png")
+        with open(grafico_path, "wb") as f:
+            f.write(grafico_png)
+        g_img = Image.open(grafico_path).convert('RGB')
+        g_perc = base_width / float(g_img.size[0])
+        g_img = g_img.resize((base_width, int(g_img.size[1] * g_perc)), Image.Resampling.LANCZOS)
+        images_to_stack.append(g_img)
+
+        combined = Image.new('RGB', (base_width, sum(i.height for i in images_to_stack)), (255, 255, 255))
+        y_off = 0
+        for i in images_to_stack:
+            combined.paste(i, (0, y_off))
+            y_off += i.height
+        combined_path = os.path.join(tmpdir, "comb.png")
+        combined.save(combined_path)
+
+        pdf = FPDF(orientation='L', unit='mm', format='A4')
+        pdf.add_page()
+        pdf.image(combined_path, x=10, y=30, w=277)
+        return bytes(pdf.output())
+
+def composicion_actual(grafico_png, banner_path, logo_path):
+    """Flujo actual: recursos en memoria y composición pasada a FPDF sin archivos."""
+    images_to_stack = [img for img in (reportes.banner_preparado(banner_path),
+                                       reportes.logo_preparado(logo_path)) if img is not None]
+    g_img = Image.open(io.BytesIO(grafico_png)).convert('RGB')
+    g_perc = reportes.ANCHO_BASE / float(g_img.size[0])
+    g_img = g_img.resize((reportes.ANCHO_BASE, int(g_img.size[1] * g_perc)), Image.Resampling.LANCZOS)
+    images_to_stack.append(g_img)
+    combined = Image.new('RGB', (reportes.ANCHO_BASE, sum(i.height for i in images_to_stack)), (255, 255, 255))
+    y_off = 0
+    for i in images_to_stack:
+        combined.paste(i, (0, y_off))
+        y_off += i.height
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.image(combined, x=10, y=30, w=277)
+    return bytes(pdf.output())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    tareas = armar_tareas(20000)
+    graficos = [reportes.RENDERIZADOR.renderizar(t['fig']) for t in tareas]
+    reportes.precargar_recursos()
+
+    print(f"{'variante':>10} {'ms por reporte':>15}")
+    for nombre, funcion in (("antes", composicion_anterior), ("después", composicion_actual)):
+        inicio = time.perf_counter()
+        for _ in range(args.repeticiones):
+            for tarea, grafico_png in zip(tareas, graficos):
+                funcion(grafico_png, reportes.BANNER_PATH, tarea['logo_path'])
+        ms = 1000 * (time.perf_counter() - inicio) / (args.repeticiones * len(tareas))
+        print(f"{nombre:>10} {ms:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compara la tabla del PDF con ``iterrows`` + ``pdf.cell`` contra ``reportes.escribir_tabla``.
+
+Tablas hora × destino como las del reporte (con fila ``TOTAL``), desde un
+día hasta varias semanas de filas y de pocos a muchos destinos con nombres
+largos. Se mide escribir la tabla y serializar el PDF. Además verifica que
+el nuevo escritor imprima todos los valores y los encabezados completos
+(el ciclo anterior los cortaba a 15 caracteres y no paginaba).
+
+Uso: python -m benchmarks.bench_tabla_pdf --filas 24,168,720 --destinos 5,30
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+import agregacion
+import reportes
+
+
+def tabla_anterior(pdf, tabla_final):
+    """El ciclo que usaba ``generar_pdf`` antes de ``escribir_tabla`` (referencia)."""
+    num_cols = len(tabla_final.columns) + 1
+    f_size = 8 if num_cols < 7 else 6
+    pdf.set_font("Arial", "B", f_size)
+
+    col_w = 190 / num_cols
+
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(col_w, 8, "Hora", 1, 0, 'C', True)
+    for c in tabla_final.columns:
+        pdf.cell(col_w, 8, str(c)[:15], 1, 0, 'C', True)
+    pdf.ln()
+
+    pdf.set_font("Arial", "", f_size)
+    for idx, row in tabla_final.iterrows():
+        if idx == 'TOTAL':
+            pdf.set_font("Arial", "B", f_size)
+            pdf.set_fill_color(245, 245, 245)
+        else:
+            pdf.set_fill_color(255, 255, 255)
+
+        pdf.cell(col_w, 7, str(idx), 1, 0, 'L', True)
+        for val in row:
+            texto = str(int(val)) if float(val).is_integer() else f"{val:.1f}"
+            pdf.cell(col_w, 7, texto, 1, 0, 'C', True)
+        pdf.ln()
+
+def tabla_sintetica(filas, destinos, decimales, semilla=0):
+    """Tabla con ``filas`` horas (varios días seguidos) y una fila ``TOTAL``."""
+    rng = np.random.default_rng(semilla)
+    valores = rng.integers(0, 40, (filas, destinos)).astype(float)
+    if decimales:
+        valores = np.round(valores / 3, 1)
+    indice = [f"Día {h // 24 + 1} {agregacion.etiqueta_hora(h % 24)}" for h in range(filas)]
+    columnas = [f"DESTINO {d:02d} PLANTA MEJILLONES" if d % 3 == 0 else f"DESTINO {d:02d}" for d in range(destinos)]
+    tabla = pd.DataFrame(valores, index=indice, columns=columnas)
+    return pd.concat([tabla, pd.DataFrame([tabla.sum()], index=['TOTAL'])])
+
+def documento(escribir, tabla, comprimir=True):
+    """Mismo armado de páginas que ``generar_pdf``: documento apaisado y tabla en páginas verticales."""
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.compress = comprimir
+    pdf.add_page()
+    pdf.add_page(orientation='P')
+    escribir(pdf, tabla)
+    return pdf, bytes(pdf.output())
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+def verificar(tabla):
+    """Todos los textos de la tabla están en el PDF sin comprimir y dentro de páginas verticales."""
+    pdf, contenido = documento(reportes.escribir_tabla, tabla, comprimir=False)
+    for pagina in range(2, pdf.page + 1):
+        ancho, alto = pdf.pages[pagina].dimensions()
+        assert ancho < alto, f"la página {pagina} de la tabla no es vertical"
+    contenido = contenido.decode('latin-1')
+    palabras = {palabra for columna in tabla.columns for palabra in str(columna).split()}
+    faltantes = [p for p in palabras if f"({p}" not in contenido and f" {p}" not in contenido]
+    assert not faltantes, f"encabezados incompletos: {faltantes}"
+    for texto in np.unique(reportes._textos_tabla(tabla.to_numpy(dtype=float))):
+        assert f"({texto}) Tj" in contenido, f"falta el valor {texto}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", default="24,168,720")
+    parser.add_argument("--destinos", default="5,30")
+    args = parser.parse_args()
+
+    print(f"{'filas':>6} {'destinos':>9} {'anterior s':>11} {'páginas':>8} {'nuevo s':>9} {'páginas':>8} {'acel.':>7}")
+    for destinos in (int(d) for d in args.destinos.split(",")):
+        for filas in (int(f) for f in args.filas.split(",")):
+            tabla = tabla_sintetica(filas, destinos, decimales=destinos > 10)
+            verificar(tabla)
+            t_anterior, (pdf_anterior, _) = cronometrar(documento, tabla_anterior, tabla)
+            t_nuevo, (pdf_nuevo, _) = cronometrar(documento, reportes.escribir_tabla, tabla)
+            print(f"{filas:>6} {destinos:>9} {t_anterior:>11.3f} {pdf_anterior.page:>8} {t_nuevo:>9.3f} "
+                  f"{pdf_nuevo.page:>8} {t_anterior / t_nuevo:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compara la vista por empresa con la vista compacta a medida que crecen empresas y destinos.
+
+La vista por empresa envía al navegador un ``px.line`` y una tabla con
+estilo por empresa; la compacta, un solo gráfico WebGL con una faceta por
+empresa (las tablas solo se envían al expandirlas). Se mide el tiempo de
+armado en el servidor, la cantidad de gráficos Plotly que el navegador debe
+montar y los bytes serializados (JSON de las figuras más HTML de las
+tablas), que es lo que domina el tiempo hasta poder interactuar.
+
+Uso: python -m benchmarks.bench_vista_compacta --empresas 5,20,50 --destinos 5,20
+"""
+import argparse
+import datetime as dt
+import time
+
+import numpy as np
+import pandas as pd
+
+import agregacion
+import motor
+from ingesta import ResultadoCarga
+
+COLUMNAS = {'fecha_col': "Fecha", 'destino_col': "Destino", 'empresa_col': "Empresa", 'hora_col': "Hora Entrada"}
+FECHA = dt.date(2024, 1, 1)
+
+
+def carga_sintetica(empresas, destinos, filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        COLUMNAS['fecha_col']: pd.Timestamp(FECHA) + pd.to_timedelta(rng.integers(0, 7, filas), unit='D'),
+        COLUMNAS['destino_col']: pd.Categorical([f"DESTINO {d:02d}" for d in rng.integers(0, destinos, filas)]),
+        COLUMNAS['empresa_col']: pd.Categorical([f"EMPRESA {e:02d}" for e in rng.integers(0, empresas, filas)]),
+        COLUMNAS['hora_col']: rng.integers(0, 24, filas),
+    })
+    cubo = agregacion.construir_cubo(df, COLUMNAS)
+    indice = agregacion.IndiceDiario(cubo, COLUMNAS['fecha_col'])
+    return ResultadoCarga(df, COLUMNAS, cubo, indice, agregacion.AgregadoDiario(indice, COLUMNAS), "memoria", 0)
+
+def por_empresa(carga, cubo, empresas):
+    """Lo que envía la vista por empresa: un gráfico y una tabla con estilo por empresa."""
+    graficos = 0
+    tamano = 0
+    for empresa in empresas:
+        vista = motor.vista_empresa(carga, cubo, empresa, FECHA)
+        if vista.fig is not None:
+            graficos += 1
+            tamano += len(vista.fig.to_json())
+        if vista.tabla is not None:
+            tamano += len(vista.tabla.style.format(precision=vista.precision).to_html())
+    return graficos, tamano
+
+def compacta(carga, cubo, empresas):
+    resumen = motor.resumen_compacto(carga, cubo, empresas, FECHA)
+    fig = motor.figura_compacta(resumen, COLUMNAS, empresas, f"Equipos por hora - {FECHA}")
+    return 1, len(fig.to_json())
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empresas", default="5,20,50")
+    parser.add_argument("--destinos", default="5,20")
+    parser.add_argument("--filas", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # La primera figura carga las plantillas de Plotly; no se cuenta
+    motor.plotly_express().line(pd.DataFrame({"x": [0], "y": [0]}), x="x", y="y").to_json()
+
+    print(f"{'empresas':>9} {'destinos':>9} {'vista':>12} {'armado s':>9} {'gráficos':>9} {'KB':>9}")
+    for n_destinos in (int(d) for d in args.destinos.split(",")):
+        for n_empresas in (int(e) for e in args.empresas.split(",")):
+            carga = carga_sintetica(n_empresas, n_destinos, args.filas)
+            cubo = carga.indice.dia(FECHA)
+            empresas = sorted(cubo[COLUMNAS['empresa_col']].unique())
+            for nombre, funcion in (("por empresa", por_empresa), ("compacta", compacta)):
+                segundos, (graficos, tamano) = cronometrar(funcion, carga, cubo, empresas)
+                print(f"{n_empresas:>9} {n_destinos:>9} {nombre:>12} {segundos:>9.3f} {graficos:>9} "
+                      f"{tamano / 1024:>9.0f}")
+
+            # Mismos valores en los dos caminos
+            resumen = motor.resumen_compacto(carga, cubo, empresas, FECHA)
+            for empresa in empresas[:3]:
+                esperado = motor.vista_empresa(carga, cubo, empresa, FECHA).resumen
+                obtenido = resumen[resumen[COLUMNAS['empresa_col']] == empresa].drop(columns=COLUMNAS['empresa_col'])
+                pd.testing.assert_frame_equal(obtenido.reset_index(drop=True), esperado.reset_index(drop=True),
+                                              check_dtype=False, check_categorical=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Generador de libros de despacho sintéticos con el layout posicional esperado."""
+import datetime as dt
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Ancho típico de la hoja de despacho; solo A, D, L y O son usadas por el dashboard
+NUM_COLUMNAS = 20
+ENCABEZADO = ["Fecha"] + [f"Col{i}" for i in range(1, NUM_COLUMNAS)]
+ENCABEZADO[3] = "Destino"
+ENCABEZADO[11] = "Empresa"
+ENCABEZADO[14] = "Hora Entrada"
+
+# Límite de filas de una hoja de Excel (sin contar el encabezado)
+MAX_FILAS_HOJA = 1_048_575
+
+EMPRESAS = ["M&Q SPA", "M S & D SPA", "COSEDUCAM S A", "AG SERVICES SPA", "JORQUERA TRANSPORTE S. A."]
+DESTINOS = ["BAQUEDANO", "BAQUEDANO/CLB", "ANGAMOS", "SALAR", "MEJILLONES"]
+
+# Formas en que llegan escritos los nombres en las planillas reales; todas
+# normalizan al nombre canónico (la primera de cada lista)
+VARIANTES_EMPRESA = {
+    "M&Q SPA": ["M&Q SPA", "M & Q", "m.q. spa", "MINING AND QUARRYING SPA", "Mq Spa"],
+    "M S & D SPA": ["M S & D SPA", "M.S.&D. SPA", "Ms&d Spa", "MINING SERVICES AND DERIVATES"],
+    "COSEDUCAM S A": ["COSEDUCAM S A", "Coseducam"],
+    "AG SERVICES SPA": ["AG SERVICES SPA", "AG Service SPA", "A.G. SERVICES SPA"],
+    "JORQUERA TRANSPORTE S. A.": ["JORQUERA TRANSPORTE S. A.", "Jorquera Transporte S.A.",
+                                  "JORQUERA  TRANSPORTE SA"],
+}
+VARIANTES_DESTINO = {
+    "BAQUEDANO": ["BAQUEDANO", "BAQUEDANO/CLB", "Baquedano/CLB", "baq", " BAQUEDANO CLB"],
+    "ANGAMOS": ["ANGAMOS", "Angamos"],
+    "SALAR": ["SALAR", "salar "],
+    "MEJILLONES": ["MEJILLONES"],
+}
+
+INICIO = dt.datetime(2024, 1, 1)
+HORAS = np.array([dt.time(h, m) for h in range(24) for m in range(60)], dtype=object)
+
+
+def _elegir(rng, filas, canonicos, variantes):
+    """Elige un nombre canónico al azar y, si ``variantes``, una de sus formas escritas."""
+    if not variantes:
+        return np.array(canonicos, dtype=object)[rng.integers(0, len(canonicos), filas)]
+    formas = [forma for canonico in variantes for forma in variantes[canonico]]
+    pesos = [1 / len(variantes) / len(variantes[canonico]) for canonico in variantes for _ in variantes[canonico]]
+    return np.array(formas, dtype=object)[rng.choice(len(formas), size=filas, p=pesos)]
+
+def columnas_aleatorias(filas, dias=30, semilla=0, variantes=True):
+    """Fechas, destinos, empresas y horas al azar, reproducibles con ``semilla``."""
+    rng = np.random.default_rng(semilla)
+    fechas = INICIO + pd.to_timedelta(rng.integers(0, dias, filas), unit='D')
+    destinos = _elegir(rng, filas, DESTINOS, VARIANTES_DESTINO if variantes else None)
+    empresas = _elegir(rng, filas, EMPRESAS, VARIANTES_EMPRESA if variantes else None)
+    horas = HORAS[rng.integers(0, len(HORAS), filas)]
+    return fechas, destinos, empresas, horas
+
+def generar_libro(filas, dias=30, semilla=0, variantes=True):
+    """Devuelve los bytes de un .xlsx con ``filas`` viajes repartidos en ``dias``.
+
+    Más allá de ``MAX_FILAS_HOJA`` filas los viajes siguen en hojas nuevas,
+    cada una con su encabezado (se leen con ``todas_las_hojas=True``).
+    """
+    fechas, destinos, empresas, horas = columnas_aleatorias(filas, dias, semilla, variantes)
+    fechas = fechas.to_pydatetime()
+    libro = Workbook(write_only=True)
+    relleno = [f"dato{i}" for i in range(NUM_COLUMNAS)]
+    hoja = None
+    for i in range(filas):
+        if i % MAX_FILAS_HOJA == 0:
+            hoja = libro.create_sheet("Despacho" if i == 0 else f"Despacho {i // MAX_FILAS_HOJA + 1}")
+            hoja.append(ENCABEZADO)
+        fila = list(relleno)
+        fila[0] = fechas[i]
+        fila[3] = destinos[i]
+        fila[11] = empresas[i]
+        fila[14] = horas[i]
+        hoja.append(fila)
+    if hoja is None:
+        libro.create_sheet("Despacho").append(ENCABEZADO)
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+def generar_dataframe(filas, dias=30, semilla=0, variantes=True):
+    """Igual que ``generar_libro`` pero devuelve el DataFrame crudo sin pasar por Excel."""
+    fechas, destinos, empresas, horas = columnas_aleatorias(filas, dias, semilla, variantes)
+    # Las columnas de relleno van como categóricas para que 5M filas quepan en memoria
+    datos = {nombre: pd.Categorical.from_codes(np.zeros(filas, dtype=np.int8), [f"dato{i}"])
+             for i, nombre in enumerate(ENCABEZADO)}
+    datos[ENCABEZADO[0]] = np.asarray(fechas.to_pydatetime(), dtype=object)
+    datos[ENCABEZADO[3]] = destinos
+    datos[ENCABEZADO[11]] = empresas
+    datos[ENCABEZADO[14]] = horas
+    return pd.DataFrame(datos)
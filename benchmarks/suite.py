@@ -0,0 +1,201 @@
+"""Mide cada etapa del dashboard sin Streamlit y guarda los tiempos en JSON.
+
+Etapas: lectura del Excel, fechas y horas, normalización, cubo, filtrado,
+vistas por empresa, construcción de gráficos y PDF, más el arranque en frío
+de ``dashboard.py`` y ``app.py`` (``bench_arranque``, con ``filas`` = 0). Con ``--comparar`` se
+contrasta contra un JSON anterior y el proceso termina con código 1 si
+alguna etapa empeora más que ``--tolerancia``.
+
+Uso: python -m benchmarks.suite --filas 10000,100000,1000000 --salida resultados.json
+     python -m benchmarks.suite --filas 10000,100000 --comparar resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import plotly.express as px
+
+import agregacion
+import ingesta
+import reportes
+from benchmarks.bench_arranque import medir_arranque
+from benchmarks.sintetico import generar_dataframe, generar_libro
+from instrumentacion import MEDIDOR
+
+HORA_RANGO = (6, 20)
+
+# Diferencias menores a esto se consideran ruido al comparar
+RUIDO_S = 0.005
+
+
+def cronometrar(tiempos, etapa, funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    tiempos.setdefault(etapa, []).append(time.perf_counter() - inicio)
+    return resultado
+
+def leer_todas_las_hojas(contenido):
+    """Lectura sin limpiar de todas las hojas (más de ~1M filas no caben en una)."""
+    partes = [ingesta.leer_excel(contenido, hoja=hoja) for hoja in ingesta.hojas_libro(contenido)]
+    columnas = partes[0][1]
+    return pd.concat([df for df, _ in partes], ignore_index=True), columnas
+
+def limpiar(tiempos, crudo, columnas):
+    """``limpiar_dataframe`` separando sus tramos con el medidor del dashboard."""
+    MEDIDOR.limpiar()
+    df, columnas = ingesta.limpiar_dataframe(crudo, columnas)
+    for tramo, etapa in (("ingesta: fechas y horas", "fechas y horas"), ("ingesta: normalización", "normalización")):
+        tiempos.setdefault(etapa, []).extend(MEDIDOR.muestras.get(tramo, []))
+    return df, columnas
+
+def vistas(cubo_filtrado, agregado, indice, columnas):
+    """Gráfico y tabla del día por empresa, más el perfil promedio del rango completo."""
+    resumenes = {}
+    tablas = {}
+    for empresa in sorted(cubo_filtrado[columnas['empresa_col']].unique()):
+        cubo_empresa = cubo_filtrado[cubo_filtrado[columnas['empresa_col']] == empresa]
+        resumenes[empresa] = agregacion.resumen_por_hora(cubo_empresa, columnas)
+        tablas[empresa] = agregacion.tabla_por_hora(cubo_empresa, columnas, HORA_RANGO)
+        agregado.perfil(empresa, indice.primera, indice.ultima, 'Promedio', 90, None, HORA_RANGO)
+    return resumenes, tablas
+
+def graficos(resumenes, columnas):
+    figuras = {}
+    for empresa, resumen in resumenes.items():
+        fig = px.line(resumen, x=columnas['hora_col'], y="Cantidad", color=columnas['destino_col'],
+                      markers=True, title=f"Equipos por hora - {empresa}")
+        fig.to_json()  # lo que serializa st.plotly_chart
+        figuras[empresa] = fig
+    return figuras
+
+def pdfs(figuras, tablas, etiqueta):
+    for empresa, fig in figuras.items():
+        reportes.generar_pdf(empresa, etiqueta, fig, tablas[empresa], logo_path=reportes.LOGOS.get(empresa))
+
+def medir_tamano(filas, repeticiones, excel_hasta, con_pdf):
+    """Devuelve ``{etapa: [segundos, ...]}`` para un tamaño."""
+    tiempos = {}
+    crudo_df = generar_dataframe(filas)
+    contenido = generar_libro(filas) if filas <= excel_hasta else None
+    for _ in range(repeticiones):
+        if contenido is not None:
+            crudo, columnas = cronometrar(tiempos, "lectura excel", leer_todas_las_hojas, contenido)
+        else:
+            crudo, columnas = crudo_df, ingesta.resolver_columnas(crudo_df)
+        df, columnas = limpiar(tiempos, crudo, columnas)
+
+        def construir():
+            cubo = agregacion.construir_cubo(df, columnas)
+            indice = agregacion.IndiceDiario(cubo, columnas['fecha_col'])
+            return indice, agregacion.AgregadoDiario(indice, columnas)
+        indice, agregado = cronometrar(tiempos, "cubo", construir)
+
+        def filtrar():
+            dia = indice.dia(indice.primera)
+            indice.rango(indice.primera, indice.ultima)
+            return agregacion.filtrar_cubo(dia, columnas, destinos=sorted(dia[columnas['destino_col']].unique()),
+                                           empresas=sorted(dia[columnas['empresa_col']].unique()),
+                                           hora_rango=HORA_RANGO)
+        cubo_filtrado = cronometrar(tiempos, "filtrado", filtrar)
+
+        resumenes, tablas = cronometrar(tiempos, "vistas por empresa", vistas,
+                                        cubo_filtrado, agregado, indice, columnas)
+        figuras = cronometrar(tiempos, "gráficos", graficos, resumenes, columnas)
+        if con_pdf:
+            # Cada repetición cambia el título para no medir la caché de PNG
+            for fig in figuras.values():
+                fig.update_layout(title=f"{fig.layout.title.text} ({len(tiempos.get('pdf', []))})")
+            cronometrar(tiempos, "pdf", pdfs, figuras, tablas, str(indice.primera))
+    return tiempos
+
+def metadatos():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "generado_en": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def comparar(resultados, ruta_base, tolerancia):
+    """Imprime la razón contra la base; devuelve las etapas que empeoraron."""
+    with open(ruta_base, encoding="utf-8") as f:
+        base = {(r["filas"], r["etapa"]): r for r in json.load(f)["resultados"]}
+    regresiones = []
+    print(f"\n{'filas':>10} {'etapa':>20} {'base s':>9} {'actual s':>9} {'razón':>7}")
+    for r in resultados:
+        anterior = base.get((r["filas"], r["etapa"]))
+        if anterior is None:
+            continue
+        razon = r["mediana_s"] / anterior["mediana_s"] if anterior["mediana_s"] else float("inf")
+        empeora = razon > 1 + tolerancia and r["mediana_s"] - anterior["mediana_s"] > RUIDO_S
+        if empeora:
+            regresiones.append(r)
+        marca = "  <-- regresión" if empeora else ""
+        print(f"{r['filas']:>10} {r['etapa']:>20} {anterior['mediana_s']:>9.3f} {r['mediana_s']:>9.3f} "
+              f"{razon:>6.2f}x{marca}")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", default="10000,100000", help="Tamaños separados por coma (10k a 5M)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--excel-hasta", type=int, default=200_000,
+                        help="Sobre este tamaño se omite la lectura del .xlsx (openpyxl es lento)")
+    parser.add_argument("--sin-pdf", action="store_true", help="Omite la etapa de PDF (requiere Kaleido)")
+    parser.add_argument("--sin-arranque", action="store_true", help="Omite la medición de arranque de los scripts")
+    parser.add_argument("--salida", default="resultados_benchmark.json")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido por etapa al comparar")
+    args = parser.parse_args()
+
+    # Plotly Express carga sus plantillas en el primer gráfico; no se cuenta en la primera medición
+    px.line(pd.DataFrame({"x": [0], "y": [0]}), x="x", y="y").to_json()
+    if not args.sin_pdf:
+        reportes.RENDERIZADOR.calentar()
+        reportes.precargar_recursos()
+
+    resultados = []
+    arranque = []
+    if not args.sin_arranque:
+        # Cada medición arranca un intérprete nuevo, sin lo ya importado por este proceso
+        for script in ("dashboard.py", "app.py"):
+            detalle = medir_arranque(script, args.repeticiones)
+            arranque.append(detalle)
+            resultados.append({"filas": 0, "etapa": f"arranque {script}", "mediana_s": detalle["total_s"],
+                               "min_s": min(detalle["muestras_total_s"]), "muestras_s": detalle["muestras_total_s"]})
+
+    print(f"{'filas':>10} {'etapa':>20} {'mediana s':>10} {'mín s':>9}")
+    for r in resultados:
+        print(f"{r['filas']:>10} {r['etapa']:>20} {r['mediana_s']:>10.3f} {r['min_s']:>9.3f}")
+    for filas in (int(f) for f in args.filas.split(",")):
+        tiempos = medir_tamano(filas, args.repeticiones, args.excel_hasta, not args.sin_pdf)
+        for etapa, muestras in tiempos.items():
+            resultado = {"filas": filas, "etapa": etapa, "mediana_s": statistics.median(muestras),
+                         "min_s": min(muestras), "muestras_s": muestras}
+            resultados.append(resultado)
+            print(f"{filas:>10} {etapa:>20} {resultado['mediana_s']:>10.3f} {resultado['min_s']:>9.3f}")
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadatos(), "resultados": resultados, "arranque": arranque}, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar and comparar(resultados, args.comparar, args.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,273 +1,288 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-from PIL import Image
-from fpdf import FPDF
-import tempfile
 import os
-from pathlib import Path
-
-# Forzar tema de color en Plotly
-pio.templates.default = "plotly"
-
-# --- FUNCIONES DE NORMALIZACIÓN ---
-
-def normalizar_nombre_empresa(nombre):
-    """Normaliza nombres de empresa para estandarizar variantes."""
-    nombre = str(nombre).strip().upper()
-    nombre = nombre.replace('.', '').replace('&', 'AND')
-    nombre = ' '.join(nombre.split())
-    equivalencias = {
-        "JORQUERA TRANSPORTE S A": "JORQUERA TRANSPORTE S. A.",
-        "JORQUERA TRANSPORTE SA": "JORQUERA TRANSPORTE S. A.",
-        "MINING SERVICES AND DERIVATES": "M S & D SPA",
-        "MINING SERVICES AND DERIVATES SPA": "M S & D SPA",
-        "M S AND D": "M S & D SPA",
-        "M S AND D SPA": "M S & D SPA",
-        "MSANDD SPA": "M S & D SPA",
-        "M S D": "M S & D SPA",
-        "M S D SPA": "M S & D SPA",
-        "M S & D": "M S & D SPA",
-        "M S & D SPA": "M S & D SPA",
-        "MS&D SPA": "M S & D SPA",
-        "M AND Q SPA": "M&Q SPA",
-        "M AND Q": "M&Q SPA",
-        "M Q SPA": "M&Q SPA",
-        "M & Q": "M&Q SPA",
-        "MQ SPA": "M&Q SPA",
-        "M&Q SPA": "M&Q SPA",
-        "MANDQ SPA": "M&Q SPA",
-        "MINING AND QUARRYING SPA": "M&Q SPA",
-        "MINING AND QUARRYNG SPA": "M&Q SPA",
-        "AG SERVICE SPA": "AG SERVICES SPA",
-        "AG SERVICES SPA": "AG SERVICES SPA",
-        "AG SERVICES": "AG SERVICES SPA",
-        "COSEDUCAM": "COSEDUCAM S A"
-    }
-    return equivalencias.get(nombre, nombre)
-
-def normalizar_destino(destino):
-    """Estandariza variantes de destinos, específicamente Baquedano."""
-    destino = str(destino).strip().upper()
-    # Unifica BAQUEDANO/CLB y otras variantes bajo un solo nombre
-    if destino in ["BAQUEDANO/CLB", "BAQUEDANO CLB", "BAQ"]:
-        return "BAQUEDANO"
-    return destino
+import sqlite3
+
+import agregacion
+import almacen
+import ingesta
+import motor
+import reportes
+from instrumentacion import MEDIDOR, tramo
+from normalizacion import normalizar_nombre_empresa
+from reportes import BANNER_PATH, LOGOS
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Dashboard Equipos por Hora", layout="wide")
 
-CURRENT_DIR = Path(__file__).parent
-LOGOS = {
-    "COSEDUCAM S A": str(CURRENT_DIR / "coseducam.png"),
-    "M&Q SPA": str(CURRENT_DIR / "mq.png"),
-    "M S & D SPA": str(CURRENT_DIR / "msd.png"),
-    "AGRETOC": str(CURRENT_DIR / "agretoc.png"),
-    "JORQUERA TRANSPORTE S. A.": str(CURRENT_DIR / "jorquera.png"),
-    "AG SERVICES SPA": str(CURRENT_DIR / "ag.png")
-}
-BANNER_PATH = str(CURRENT_DIR / "image.png")
+# Con el modo depuración se mide la memoria pico; cProfile también con DASHBOARD_PERFIL=<ruta.prof>
+modo_depuracion = st.sidebar.checkbox("Modo depuración", value=False)
+perfilar = modo_depuracion and st.sidebar.checkbox("Perfilar con cProfile", value=False)
+MEDIDOR.iniciar_ejecucion(memoria=modo_depuracion, perfilar=perfilar)
 
 st.title("Dashboard: Equipos por Hora, Empresa, Fecha y Destino")
 
-uploaded_file = st.file_uploader("Carga tu archivo Excel", type=["xlsx"])
+uploaded_files = st.file_uploader("Carga tus archivos Excel", type=["xlsx"], accept_multiple_files=True)
+todas_las_hojas = st.sidebar.checkbox("Leer todas las hojas de cada archivo", value=False)
+usar_historial = st.sidebar.checkbox("Usar historial guardado (SQLite)", value=False,
+                                     help="Muestra todos los archivos cargados anteriormente en lugar de solo el actual.")
+guardar_historial = st.sidebar.checkbox("Guardar los viajes cargados en el historial", value=False,
+                                        help="Inserta los viajes del archivo en la base SQLite (un archivo ya "
+                                             "guardado no se duplica). Agrega tiempo a la primera carga.")
+carga_incremental = st.sidebar.checkbox("Carga incremental (mismo archivo actualizado)", value=False,
+                                        help="Si el archivo ya se cargó antes con el mismo nombre, solo se procesan "
+                                             "los días nuevos desde el último día cargado. Aplica a un solo archivo.")
 
-if uploaded_file:
-    try:
-        df = pd.read_excel(uploaded_file)
-        required_columns_idx = {'fecha_col': 0, 'destino_col': 3, 'empresa_col': 11, 'hora_col': 14}
 
-        max_idx = max(required_columns_idx.values())
-        if len(df.columns) < max_idx + 1:
-            st.error(f"El archivo Excel debe tener al menos {max_idx + 1} columnas.")
-            st.stop()
-
-        fecha_col_name = df.columns[required_columns_idx['fecha_col']]
-        destino_col_name = df.columns[required_columns_idx['destino_col']]
-        empresa_col_name = df.columns[required_columns_idx['empresa_col']]
-        hora_col_name = df.columns[required_columns_idx['hora_col']]
-
-        # Limpieza inicial
-        df = df.dropna(subset=[fecha_col_name, destino_col_name, empresa_col_name, hora_col_name])
-
-        # Procesamiento de Fechas y Horas
-        try:
-            df[fecha_col_name] = pd.to_datetime(df[fecha_col_name], errors='coerce', dayfirst=True)
-            # Aseguramos que la hora sea extraída correctamente
-            df[hora_col_name] = pd.to_datetime(df[hora_col_name].astype(str), errors='coerce').dt.hour
-        except Exception as e:
-            st.error(f"Error al procesar fechas u horas: {str(e)}")
+def guardar_en_historial(guardar, partes, columnas):
+    """Guarda en SQLite cada parte ``(df, hash, nombre)``; si la base no está disponible solo se avisa."""
+    try:
+        insertadas = sum(guardar(df, columnas, clave, nombre) for df, clave, nombre in partes)
+    except sqlite3.Error as e:
+        st.warning(f"No se pudieron guardar los viajes en el historial: {e}")
+        return
+    if insertadas:
+        st.caption(f"{insertadas} viajes guardados en el historial.")
+
+if uploaded_files or usar_historial:
+    try:
+        with tramo("dashboard: carga"):
+            if len(uploaded_files) == 1 and not todas_las_hojas:
+                uploaded_file = uploaded_files[0]
+                contenido = uploaded_file.getvalue()
+                try:
+                    if carga_incremental:
+                        carga = ingesta.cargar_excel_incremental(
+                            contenido, uploaded_file.name, st.session_state.setdefault("ultimas_versiones", {}))
+                    else:
+                        carga = ingesta.cargar_excel_cacheado(contenido)
+                except ingesta.ErrorIngesta as e:
+                    st.error(str(e))
+                    st.stop()
+                # Persistir viajes; un archivo ya guardado se detecta por su hash y no se duplica
+                if guardar_historial:
+                    guardar = almacen.guardar_viajes_incremental if carga_incremental else almacen.guardar_viajes
+                    guardar_en_historial(guardar, [(carga.df, ingesta.hash_contenido(contenido), uploaded_file.name)],
+                                         carga.columnas)
+            elif uploaded_files:
+                archivos = [(f.name, f.getvalue()) for f in uploaded_files]
+                try:
+                    carga, detalles = ingesta.cargar_varios_excel(archivos, todas_las_hojas=todas_las_hojas)
+                except ingesta.ErrorIngesta as e:
+                    st.error(str(e))
+                    st.stop()
+                for d in detalles:
+                    if d.error:
+                        st.warning(f"No se pudo cargar {d.archivo}{f' [{d.hoja}]' if d.hoja else ''}: {d.error}")
+                with st.expander("Detalle de carga por archivo"):
+                    st.dataframe(pd.DataFrame(detalles, columns=ingesta.DetalleParte._fields).drop(columns='clave')
+                                 .style.format({'segundos': '{:.2f}'}))
+                # Cada archivo u hoja se guarda con su propio hash, así no se duplica si ya estaba guardado
+                if guardar_historial:
+                    guardar_en_historial(almacen.guardar_viajes,
+                                         [(df, d.clave, d.archivo) for d, df in ingesta.partes_carga(carga, detalles)],
+                                         carga.columnas)
+            if usar_historial:
+                try:
+                    carga = almacen.cargar_desde_bd()
+                except sqlite3.Error as e:
+                    st.error(f"No se pudo leer el historial guardado: {e}")
+                    st.stop()
+        indice, columnas = carga.indice, carga.columnas
+        # Con datos cargados es probable que se pida un PDF: Kaleido arranca en segundo plano
+        # y el banner/logos se preprocesan una sola vez por proceso
+        reportes.RENDERIZADOR.calentar_en_segundo_plano()
+        reportes.precargar_recursos()
+        st.caption(f"Datos cargados desde {carga.origen} en {carga.segundos:.2f} s")
+        aviso = ingesta.aviso_descartadas(carga.df)
+        if aviso:
+            st.warning(aviso)
+
+        fecha_col_name = columnas['fecha_col']
+        destino_col_name = columnas['destino_col']
+        empresa_col_name = columnas['empresa_col']
+        hora_col_name = columnas['hora_col']
+
+        if not indice.fechas:
+            st.warning("No se encontraron fechas válidas.")
             st.stop()
 
-        df = df.dropna(subset=[fecha_col_name, hora_col_name])
-        
-        # APLICACIÓN DE NORMALIZACIÓN (Empresa y Destino)
-        df[empresa_col_name] = df[empresa_col_name].apply(normalizar_nombre_empresa)
-        df[destino_col_name] = df[destino_col_name].apply(normalizar_destino)
-
-        # Filtros de Interfaz
-        fechas_disponibles = sorted(df[fecha_col_name].dt.date.unique())
-        fecha_sel = st.date_input("Selecciona la fecha:", 
-                                  min_value=min(fechas_disponibles), 
-                                  max_value=max(fechas_disponibles), 
-                                  value=min(fechas_disponibles))
-
-        df_filtrado = df[df[fecha_col_name].dt.date == fecha_sel].copy()
+        # Filtros de Interfaz (sobre el cubo de conteos precalculado)
+        with tramo("dashboard: filtros"):
+            modo = st.radio("Modo de vista:", ["Día", "Rango de fechas"], horizontal=True)
+            estadistica, percentil, superponer_dias = 'Suma', 90, False
+            if modo == "Día":
+                fecha_sel = st.date_input("Selecciona la fecha:", 
+                                          min_value=indice.primera, 
+                                          max_value=indice.ultima, 
+                                          value=indice.primera)
+                fecha_desde, fecha_hasta = fecha_sel, None
+            else:
+                rango_fechas = st.date_input("Selecciona el rango de fechas:",
+                                             min_value=indice.primera,
+                                             max_value=indice.ultima,
+                                             value=(indice.primera, indice.ultima))
+                if len(rango_fechas) != 2:
+                    st.info("Selecciona la fecha final del rango.")
+                    st.stop()
+                fecha_desde, fecha_hasta = rango_fechas
+
+                col_est, col_pct = st.columns(2)
+                estadistica = col_est.selectbox("Combinar días por:", agregacion.ESTADISTICAS)
+                if estadistica == 'Percentil':
+                    percentil = col_pct.slider("Percentil:", 1, 99, 90)
+                superponer_dias = st.checkbox("Superponer una línea por día", value=False)
+            etiqueta_fecha = motor.etiqueta_periodo(fecha_desde, fecha_hasta)
+            cubo_filtrado = motor.cubo_periodo(carga, fecha_desde, fecha_hasta)
         
-        destinos_disponibles = sorted(df_filtrado[destino_col_name].dropna().unique())
-        empresas_disponibles = sorted(df_filtrado[empresa_col_name].dropna().unique())
+            destinos_disponibles = sorted(cubo_filtrado[destino_col_name].unique())
+            empresas_disponibles = sorted(cubo_filtrado[empresa_col_name].unique())
 
-        destinos_sel = st.multiselect("Selecciona destino(s):", destinos_disponibles, default=list(destinos_disponibles))
-        empresas_sel = st.multiselect("Selecciona empresa(s):", empresas_disponibles, default=list(empresas_disponibles))
+            destinos_sel = st.multiselect("Selecciona destino(s):", destinos_disponibles, default=list(destinos_disponibles))
+            empresas_sel = st.multiselect("Selecciona empresa(s):", empresas_disponibles, default=list(empresas_disponibles))
 
-        df_filtrado = df_filtrado[df_filtrado[destino_col_name].isin(destinos_sel) & df_filtrado[empresa_col_name].isin(empresas_sel)]
+            cubo_filtrado = agregacion.filtrar_cubo(cubo_filtrado, columnas, destinos=destinos_sel, empresas=empresas_sel)
 
-        if not df_filtrado.empty:
-            horas_disponibles_filtradas = df_filtrado[hora_col_name].dropna().unique()
-            hora_rango = st.slider("Selecciona el rango de horas:", 0, 23, 
-                                   (int(min(horas_disponibles_filtradas)), int(max(horas_disponibles_filtradas))), 
-                                   format="%d:00")
-            df_filtrado = df_filtrado[(df_filtrado[hora_col_name] >= hora_rango[0]) & (df_filtrado[hora_col_name] <= hora_rango[1])]
+            hora_rango = (0, 23)
+            if not cubo_filtrado.empty:
+                horas_disponibles_filtradas = cubo_filtrado[hora_col_name].unique()
+                hora_rango = st.slider("Selecciona el rango de horas:", 0, 23, 
+                                       (int(min(horas_disponibles_filtradas)), int(max(horas_disponibles_filtradas))), 
+                                       format="%d:00")
+                cubo_filtrado = agregacion.filtrar_cubo(cubo_filtrado, columnas, hora_rango=hora_rango)
 
-        df_filtrado['Hora Intervalo'] = df_filtrado[hora_col_name].apply(lambda h: f"{str(int(h)).zfill(2)}:00 - {str(int(h)).zfill(2)}:59")
-
-        # Visualización por Empresa
-        for empresa in empresas_sel:
-            empresa_normalizada = normalizar_nombre_empresa(empresa)
-            df_empresa = df_filtrado[df_filtrado[empresa_col_name] == empresa_normalizada].copy()
+            # Con muchas empresas el navegador tarda más en dibujar que el servidor en calcular
+            vista_compacta = st.checkbox("Vista compacta (todas las empresas en un gráfico)",
+                                         value=False, key="vista_compacta")
 
-            st.markdown(f"---\n## Empresa: {empresa}")
-            col1, col2 = st.columns([2, 2])
+        # Generación en lote: se llena al final, una vez armadas las tareas de cada empresa
+        contenedor_lote = st.container()
+        tareas_pdf = []
 
-            with col1:
-                if os.path.exists(BANNER_PATH): st.image(BANNER_PATH, use_container_width=True)
-                logo_path = LOGOS.get(empresa_normalizada)
-                if logo_path and os.path.exists(logo_path): st.image(logo_path, width=100)
-
-                resumen_grafico = df_empresa.groupby([hora_col_name, destino_col_name]).size().reset_index(name='Cantidad')
-                if not resumen_grafico.empty:
-                    fig = px.line(resumen_grafico, x=hora_col_name, y="Cantidad", color=destino_col_name, 
-                                  markers=True, title=f"Equipos por hora - {empresa}")
-                    st.plotly_chart(fig, use_container_width=True)
-
-            with col2:
-                if not df_empresa.empty:
-                    tabla = pd.pivot_table(df_empresa, index='Hora Intervalo', columns=destino_col_name, 
-                                           values=empresa_col_name, aggfunc='count', fill_value=0)
-                    
-                    # Reindexar para mostrar todas las horas del rango seleccionado
-                    horas_labels = [f"{str(h).zfill(2)}:00 - {str(h).zfill(2)}:59" for h in range(hora_rango[0], hora_rango[1] + 1)]
-                    tabla = tabla.reindex(horas_labels, fill_value=0)
-                    
-                    sumatoria = pd.DataFrame(tabla.sum(axis=0)).T
-                    sumatoria.index = ['TOTAL']
-                    tabla_final = pd.concat([tabla, sumatoria])
-                    st.dataframe(tabla_final.style.format(precision=0))
-
-            # --- GENERACIÓN DE PDF ---
+        # --- GENERACIÓN DE PDF ---
+        def boton_pdf(empresa, vista, logo_path):
+            empresa_normalizada = normalizar_nombre_empresa(empresa)
             if st.button(f"Generar PDF para {empresa}", key=f"btn_{empresa_normalizada}"):
                 with st.spinner("Generando Reporte PDF..."):
                     try:
-                        with tempfile.TemporaryDirectory() as tmpdir:
-                            # 1. Gráfico a Imagen
-                            grafico_path = os.path.join(tmpdir, "graf.png")
-                            fig.update_layout(width=900, height=400)
-                            fig.write_image(grafico_path, scale=2)
-
-                            # 2. Procesar imágenes para el stack
-                            images_to_stack = []
-                            base_width = 1800 
-
-                            # Banner
-                            if os.path.exists(BANNER_PATH):
-                                b_img = Image.open(BANNER_PATH).convert('RGB')
-                                w_perc = base_width / float(b_img.size[0])
-                                b_img = b_img.resize((base_width, int(b_img.size[1] * w_perc)), Image.Resampling.LANCZOS)
-                                images_to_stack.append(b_img)
-
-                            # Logo Empresa (con fondo blanco para evitar transparencia negra)
-                            if logo_path and os.path.exists(logo_path):
-                                l_img = Image.open(logo_path).convert('RGBA')
-                                l_small_w = 250 
-                                l_perc = l_small_w / float(l_img.size[0])
-                                l_img = l_img.resize((l_small_w, int(l_img.size[1] * l_perc)), Image.Resampling.LANCZOS)
-                                
-                                l_canvas = Image.new('RGB', (base_width, l_img.height + 60), (255, 255, 255))
-                                l_canvas.paste(l_img, (60, 30), mask=l_img) 
-                                images_to_stack.append(l_canvas)
-
-                            # Gráfico
-                            g_img = Image.open(grafico_path).convert('RGB')
-                            g_perc = base_width / float(g_img.size[0])
-                            g_img = g_img.resize((base_width, int(g_img.size[1] * g_perc)), Image.Resampling.LANCZOS)
-                            images_to_stack.append(g_img)
-
-                            # Combinar imágenes
-                            total_h = sum(i.height for i in images_to_stack)
-                            combined = Image.new('RGB', (base_width, total_h), (255, 255, 255))
-                            y_off = 0
-                            for i in images_to_stack:
-                                combined.paste(i, (0, y_off))
-                                y_off += i.height
-                            
-                            combined_path = os.path.join(tmpdir, "comb.png")
-                            combined.save(combined_path)
-
-                            # 3. Construir PDF con FPDF
-                            pdf = FPDF(orientation='L', unit='mm', format='A4')
-                            pdf.add_page()
-                            pdf.set_font("Arial", "B", 16)
-                            pdf.cell(0, 10, f"Reporte de Equipos - {empresa}", ln=1, align="C")
-                            pdf.set_font("Arial", "", 10)
-                            pdf.cell(0, 10, f"Fecha: {fecha_sel}", ln=1, align="C")
-                            
-                            pdf.image(combined_path, x=10, y=30, w=277)
-                            
-                            # Página 2: Tabla de Datos
-                            pdf.add_page(orientation='P')
-                            pdf.set_font("Arial", "B", 12)
-                            pdf.cell(0, 10, "Detalle por Destino y Horario", ln=1, align="C")
-                            
-                            num_cols = len(tabla_final.columns) + 1
-                            f_size = 8 if num_cols < 7 else 6
-                            pdf.set_font("Arial", "B", f_size)
-                            
-                            col_w = 190 / num_cols
-                            
-                            # Encabezado Tabla
-                            pdf.set_fill_color(240, 240, 240)
-                            pdf.cell(col_w, 8, "Hora", 1, 0, 'C', True)
-                            for c in tabla_final.columns:
-                                pdf.cell(col_w, 8, str(c)[:15], 1, 0, 'C', True)
-                            pdf.ln()
-
-                            # Filas Tabla
-                            pdf.set_font("Arial", "", f_size)
-                            for idx, row in tabla_final.iterrows():
-                                if idx == 'TOTAL': 
-                                    pdf.set_font("Arial", "B", f_size)
-                                    pdf.set_fill_color(245, 245, 245)
-                                else:
-                                    pdf.set_fill_color(255, 255, 255)
-                                
-                                pdf.cell(col_w, 7, str(idx), 1, 0, 'L', True)
-                                for val in row:
-                                    pdf.cell(col_w, 7, str(int(val)), 1, 0, 'C', True)
-                                pdf.ln()
-
-                            pdf_output = os.path.join(tmpdir, "report.pdf")
-                            pdf.output(pdf_output)
-                            
-                            with open(pdf_output, "rb") as f:
-                                st.download_button(f"📥 Descargar PDF {empresa}", f, 
-                                                   file_name=f"Reporte_{empresa}_{fecha_sel}.pdf",
-                                                   key=f"dl_{empresa_normalizada}")
+                        if vista.fig is None or vista.tabla is None:
+                            raise ValueError("no hay datos para los filtros seleccionados")
+                        with tramo("reportes: pdf"):
+                            pdf_bytes = reportes.generar_pdf(empresa, etiqueta_fecha, vista.fig, vista.tabla,
+                                                             logo_path=logo_path)
+                        st.download_button(f"📥 Descargar PDF {empresa}", pdf_bytes, 
+                                           file_name=reportes.nombre_archivo(empresa, etiqueta_fecha),
+                                           key=f"dl_{empresa_normalizada}")
 
                     except Exception as e:
                         st.error(f"Error generando el PDF: {e}")
 
+        if vista_compacta:
+            # Un solo gráfico WebGL con una faceta por empresa; las tablas solo se arman al expandirlas
+            with tramo("dashboard: gráfico"):
+                resumen = motor.resumen_compacto(carga, cubo_filtrado, empresas_sel, fecha_desde, fecha_hasta,
+                                                 estadistica, percentil, destinos_sel, hora_rango)
+                titulo = (f"Equipos por hora - {etiqueta_fecha}" if fecha_hasta is None else
+                          f"Equipos por hora ({estadistica.lower()}, {etiqueta_fecha})")
+                fig = motor.figura_compacta(resumen, columnas, empresas_sel, titulo)
+                if fig is None:
+                    st.info("No hay datos para los filtros seleccionados.")
+                else:
+                    st.plotly_chart(fig, use_container_width=True)
+
+            for empresa in empresas_sel:
+                empresa_normalizada = normalizar_nombre_empresa(empresa)
+                detalle = st.expander(f"Tabla y PDF - {empresa}", key=f"exp_{empresa_normalizada}",
+                                      on_change="rerun")
+                if not detalle.open:
+                    continue
+                with detalle:
+                    vista = motor.vista_empresa(carga, cubo_filtrado, empresa, fecha_desde, fecha_hasta,
+                                                estadistica, percentil, destinos_sel, hora_rango)
+                    if vista.tabla is None:
+                        st.info("No hay datos para los filtros seleccionados.")
+                    else:
+                        with tramo("dashboard: tabla"):
+                            st.dataframe(vista.tabla.style.format(precision=vista.precision))
+                    boton_pdf(empresa, vista, LOGOS.get(empresa_normalizada))
+        else:
+            # Visualización por Empresa
+            for empresa in empresas_sel:
+                empresa_normalizada = normalizar_nombre_empresa(empresa)
+                vista = motor.vista_empresa(carga, cubo_filtrado, empresa, fecha_desde, fecha_hasta, estadistica,
+                                            percentil, destinos_sel, hora_rango, superponer_dias)
+                fig, tabla_final = vista.fig, vista.tabla
+
+                st.markdown(f"---\n## Empresa: {empresa}")
+                col1, col2 = st.columns([2, 2])
+
+                with col1:
+                    if os.path.exists(BANNER_PATH): st.image(BANNER_PATH, use_container_width=True)
+                    logo_path = LOGOS.get(empresa_normalizada)
+                    if logo_path and os.path.exists(logo_path): st.image(logo_path, width=100)
+
+                    if fig is None:
+                        st.info("No hay datos para los filtros seleccionados.")
+                    else:
+                        with tramo("dashboard: gráfico"):
+                            st.plotly_chart(fig, use_container_width=True)
+
+                with col2:
+                    if tabla_final is not None:
+                        with tramo("dashboard: tabla"):
+                            st.dataframe(tabla_final.style.format(precision=vista.precision))
+
+                tarea = motor.tarea_pdf(vista, etiqueta_fecha)
+                if tarea is not None:
+                    tareas_pdf.append(tarea)
+
+                boton_pdf(empresa, vista, logo_path)
+
+        with contenedor_lote:
+            # En la vista compacta las vistas por empresa no se arman hasta pedir el lote
+            total_lote = len(empresas_sel) if vista_compacta else len(tareas_pdf)
+            if total_lote and st.button(f"📦 Generar PDF de todas las empresas ({total_lote})", key="btn_lote"):
+                if vista_compacta:
+                    tareas_pdf, _ = motor.armar_tareas(carga, fecha_desde, fecha_hasta, empresas_sel, destinos_sel,
+                                                       hora_rango, estadistica, percentil)
+                progreso = st.progress(0.0, text="Generando reportes...")
+
+                def al_avanzar(completadas, total, empresa, error):
+                    estado = f"error: {error}" if error else "listo"
+                    progreso.progress(completadas / total, text=f"{completadas}/{total} - {empresa}: {estado}")
+
+                with tramo("reportes: pdf en lote"):
+                    pdfs, errores = reportes.generar_pdfs_en_paralelo(tareas_pdf, al_avanzar=al_avanzar)
+                for empresa_error, mensaje in errores.items():
+                    st.error(f"Error generando el PDF de {empresa_error}: {mensaje}")
+                if pdfs:
+                    st.download_button("📥 Descargar ZIP con todos los reportes", reportes.empaquetar_zip(pdfs),
+                                       file_name=f"Reportes_{etiqueta_fecha.replace(' ', '_')}.zip",
+                                       mime="application/zip", key="dl_lote")
+
     except Exception as e:
         st.error(f"Error al procesar el archivo: {e}")
 else:
     st.info("👋 Bienvenido. Por favor, carga un archivo Excel para comenzar el análisis.")
+
+# --- PANEL DE DEPURACIÓN (al final para reflejar el trabajo de esta ejecución) ---
+MEDIDOR.terminar_ejecucion()
+if modo_depuracion:
+    with st.sidebar.expander("Tiempos por etapa", expanded=True):
+        st.dataframe(pd.DataFrame(MEDIDOR.estadisticas()), hide_index=True)
+        memoria = MEDIDOR.memoria()
+        if memoria:
+            st.caption(f"Memoria pico: {memoria['pico_ultima_mb']} MB (p95 {memoria['pico_p95_mb']} MB "
+                       f"en {memoria['ejecuciones']} ejecuciones)")
+        st.download_button("Exportar tiempos (JSON)", MEDIDOR.exportar_json(),
+                           file_name="tiempos_dashboard.json", mime="application/json")
+    if MEDIDOR.ultimo_perfil is not None:
+        with st.sidebar.expander("cProfile (última ejecución perfilada)"):
+            st.code(MEDIDOR.ultimo_perfil_texto)
+            st.download_button("Descargar .prof", MEDIDOR.ultimo_perfil, file_name="dashboard.prof")
+    with st.sidebar.expander("Caché de ingesta", expanded=True):
+        st.json(ingesta.CACHE_INGESTA.estadisticas())
+    with st.sidebar.expander("Caché en disco", expanded=True):
+        st.json(ingesta.CACHE_DISCO.estadisticas())
+    with st.sidebar.expander("Renderizado de gráficos", expanded=True):
+        st.json(reportes.RENDERIZADOR.estadisticas())
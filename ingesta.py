@@ -0,0 +1,675 @@
+"""Ingesta de archivos Excel de despacho: lectura, limpieza y caché."""
+import datetime as dt
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from agregacion import AgregadoDiario, IndiceDiario, construir_cubo
+from instrumentacion import tramo
+from normalizacion import normalizar_empresas, normalizar_destinos
+
+# Posiciones de las columnas usadas por el dashboard (A, D, L, O)
+COLUMNAS_REQUERIDAS = {'fecha_col': 0, 'destino_col': 3, 'empresa_col': 11, 'hora_col': 14}
+
+# Incrementar cuando cambie la limpieza para invalidar la caché en disco
+VERSION_ESQUEMA = 6
+
+# ``HH:MM`` o ``HH:MM:SS`` (con fracción de segundo opcional)
+PATRON_HORA = r'^\s*(\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?\s*$'
+
+ResultadoCarga = namedtuple('ResultadoCarga', 'df columnas cubo indice agregado origen segundos')
+
+
+class ErrorIngesta(ValueError):
+    """Error de formato o contenido en el archivo cargado."""
+
+
+# --- LIMPIEZA ---
+
+def hash_contenido(contenido):
+    """Devuelve el hash SHA-256 de los bytes del archivo."""
+    return hashlib.sha256(contenido).hexdigest()
+
+def resolver_columnas(df):
+    """Obtiene los nombres de las columnas requeridas según su posición."""
+    max_idx = max(COLUMNAS_REQUERIDAS.values())
+    if len(df.columns) < max_idx + 1:
+        raise ErrorIngesta(f"El archivo Excel debe tener al menos {max_idx + 1} columnas.")
+    return {clave: df.columns[idx] for clave, idx in COLUMNAS_REQUERIDAS.items()}
+
+def _horas_numericas(valores):
+    """Hora de números: enteros 0-23 son horas; el resto, fracciones de día de Excel.
+
+    De las fracciones (0.5 = 12:00) se ignora la parte entera, que en una
+    fecha y hora de Excel es el día. Los enteros desde 24 no se reconocen.
+    """
+    valores = np.asarray(valores, dtype=float)
+    with np.errstate(invalid='ignore'):
+        # Redondear al segundo evita que 08:00 (0.3333...) caiga en las 7
+        segundos = np.round(np.mod(valores, 1) * 86400)
+        horas = (segundos // 3600) % 24
+        enteros = valores == np.floor(valores)
+    horas[enteros] = np.where(valores[enteros] < 24, valores[enteros], np.nan)
+    horas[~np.isfinite(valores) | (valores < 0)] = np.nan
+    return horas
+
+def _horas_texto(textos):
+    """Hora de textos ``HH:MM[:SS]``; el resto se intenta como fecha y hora completa."""
+    partes = textos.str.extract(PATRON_HORA).astype(float)
+    horas, minutos, segundos = partes[0], partes[1], partes[2].fillna(0)
+    validas = (horas < 24) & (minutos < 60) & (segundos < 60)
+    resultado = horas.where(validas).to_numpy(copy=True)
+    resto = partes[0].isna().to_numpy()
+    if resto.any():
+        # p. ej. "2024-01-05 07:30" o "7:30 PM"; son pocos valores únicos
+        resultado[resto] = pd.to_datetime(textos[resto], errors='coerce', format='mixed').dt.hour.to_numpy(dtype=float, na_value=np.nan)
+    return resultado
+
+def extraer_horas(serie):
+    """Hora del día (0-23, ``NaN`` si no se reconoce) de una columna de horas.
+
+    Acepta ``datetime.time``/``datetime``, fracciones de día de Excel,
+    horas enteras (0-23) y textos ``HH:MM[:SS]``, incluso mezclados en la
+    misma columna. Las
+    columnas de objetos se factorizan y cada tipo se convierte en bloque
+    sobre los valores únicos, que en una columna de horas son pocos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.hour.astype(float)
+    if pd.api.types.is_timedelta64_dtype(serie):
+        return (serie.dt.total_seconds() // 3600 % 24).astype(float)
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return pd.Series(_horas_numericas(serie.to_numpy(dtype=float, na_value=np.nan)), index=serie.index)
+
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(np.asarray(unicos, dtype=object))
+    horas_unicas = np.full(len(unicos), np.nan)
+    tipos = unicos.map(type)
+    es_hora = tipos.map(lambda t: issubclass(t, (dt.time, dt.datetime))).to_numpy(dtype=bool)
+    es_numero = tipos.map(lambda t: issubclass(t, (int, float, np.number)) and not issubclass(t, bool)).to_numpy(dtype=bool)
+    es_texto = tipos.map(lambda t: issubclass(t, str)).to_numpy(dtype=bool)
+    if es_hora.any():
+        horas_unicas[es_hora] = [valor.hour for valor in unicos[es_hora]]
+    if es_numero.any():
+        horas_unicas[es_numero] = _horas_numericas(unicos[es_numero].to_numpy(dtype=float))
+    if es_texto.any():
+        horas_unicas[es_texto] = _horas_texto(unicos[es_texto].reset_index(drop=True))
+    # Los nulos (código -1) toman el NaN agregado al final
+    return pd.Series(np.append(horas_unicas, np.nan)[codigos], index=serie.index)
+
+def limpiar_dataframe(df, columnas=None):
+    """Limpia, parsea fechas/horas y normaliza un DataFrame crudo.
+
+    Si no se entregan ``columnas`` se resuelven por posición sobre ``df``.
+    Devuelve el DataFrame limpio y un diccionario con los nombres reales de
+    las columnas requeridas (claves de ``COLUMNAS_REQUERIDAS``). Las filas
+    con fecha u hora no reconocida se descartan y se cuentan en
+    ``df.attrs['descartadas']`` (``{'fecha': n, 'hora': n}``); las de hora no
+    reconocida y fecha válida, también por día en ``df.attrs['descartadas_dia']``.
+    """
+    if columnas is None:
+        columnas = resolver_columnas(df)
+    huellas = df.attrs.get('huellas_dia')
+    fecha_col = columnas['fecha_col']
+    destino_col = columnas['destino_col']
+    empresa_col = columnas['empresa_col']
+    hora_col = columnas['hora_col']
+
+    # Solo se conservan las columnas que usa el dashboard
+    df = df[[fecha_col, destino_col, empresa_col, hora_col]]
+    df = df.dropna(subset=[fecha_col, destino_col, empresa_col, hora_col])
+
+    with tramo("ingesta: fechas y horas"):
+        try:
+            df[fecha_col] = pd.to_datetime(df[fecha_col], errors='coerce', dayfirst=True)
+            df[hora_col] = extraer_horas(df[hora_col])
+        except Exception as e:
+            raise ErrorIngesta(f"Error al procesar fechas u horas: {str(e)}") from e
+
+        sin_hora = df[hora_col].isna()
+        descartadas = {'fecha': int(df[fecha_col].isna().sum()), 'hora': int(sin_hora.sum())}
+        por_dia = df.loc[sin_hora, fecha_col].dropna().dt.strftime('%Y-%m-%d').value_counts()
+        descartadas_dia = {dia: int(n) for dia, n in por_dia.items()}
+        df = df.dropna(subset=[fecha_col, hora_col])
+        df[hora_col] = df[hora_col].astype('int32')
+
+    with tramo("ingesta: normalización"):
+        df[empresa_col] = normalizar_empresas(df[empresa_col])
+        df[destino_col] = normalizar_destinos(df[destino_col])
+    df.attrs['descartadas'] = descartadas
+    df.attrs['descartadas_dia'] = descartadas_dia
+    if huellas is not None:
+        df.attrs['huellas_dia'] = huellas
+    return df, columnas
+
+def aviso_descartadas(df):
+    """Texto con las filas descartadas por fecha u hora no reconocida, o ``None`` si no hubo.
+
+    ``df`` es ``None`` cuando los datos vienen del historial (solo hay cubo).
+    """
+    if df is None:
+        return None
+    descartadas = df.attrs.get('descartadas', {})
+    partes = [f"{n} sin {campo} válida" for campo, n in descartadas.items() if n]
+    if not partes:
+        return None
+    return f"Se descartaron filas al cargar: {', '.join(partes)}."
+
+
+# --- LECTURA ---
+
+class LayoutInesperado(Exception):
+    """El libro no se puede leer en modo streaming; se usa ``pd.read_excel``."""
+
+def _nombres_encabezado(encabezado):
+    """Replica los nombres de columna que asignaría ``pd.read_excel``."""
+    nombres = []
+    vistos = {}
+    for idx, valor in enumerate(encabezado):
+        nombre = f"Unnamed: {idx}" if valor is None else valor
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        vistos.setdefault(nombre, 0)
+        nombres.append(nombre)
+    return nombres
+
+def _dia_tipado(valor):
+    """Día de una celda de fecha ya tipada por openpyxl, o ``None`` si no lo está."""
+    if isinstance(valor, dt.datetime):
+        return valor.date()
+    if isinstance(valor, dt.date):
+        return valor
+    return None
+
+def mismo_prefijo(huellas_anteriores, huellas_nuevas, corte):
+    """Indica si las huellas (``huellas_dia``) de dos versiones coinciden antes de ``corte``.
+
+    Sin huellas de alguna de las dos devuelve ``False``.
+    """
+    if huellas_anteriores is None or huellas_nuevas is None:
+        return False
+    corte = str(corte)
+    return ({dia: h for dia, h in huellas_anteriores.items() if dia < corte} ==
+            {dia: h for dia, h in huellas_nuevas.items() if dia < corte})
+
+def hojas_libro(contenido):
+    """Nombres de las hojas del libro, en orden."""
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(io.BytesIO(contenido), read_only=True)
+    except Exception as e:
+        raise ErrorIngesta(f"No se pudo abrir el libro: {e}") from e
+    try:
+        return list(libro.sheetnames)
+    finally:
+        libro.close()
+
+def leer_excel_streaming(contenido, tamano_bloque=50_000, desde=None, hoja=None):
+    """Lee las columnas A, D, L y O de la hoja ``hoja`` (o la primera) en modo read-only.
+
+    Devuelve ``(df, columnas)``. Con ``desde`` se omiten las filas con fecha
+    tipada anterior a ese día. ``df.attrs['huellas_dia']`` tiene un hash por
+    día (``'AAAA-MM-DD'``, ``''`` para fechas en texto) de todas las filas,
+    también las omitidas. Lanza ``LayoutInesperado`` si openpyxl no puede leer.
+    """
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    except Exception as e:
+        raise LayoutInesperado(str(e)) from e
+
+    try:
+        if not libro.worksheets:
+            raise LayoutInesperado("El libro no tiene hojas.")
+        try:
+            hoja_libro = libro.worksheets[0] if hoja is None else libro[hoja]
+        except KeyError as e:
+            raise LayoutInesperado(f"No existe la hoja {hoja!r}.") from e
+        filas = hoja_libro.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        max_idx = max(COLUMNAS_REQUERIDAS.values())
+        if encabezado is None or len(encabezado) < max_idx + 1:
+            raise LayoutInesperado("Encabezado ausente o con menos columnas de las requeridas.")
+
+        nombres = _nombres_encabezado(encabezado)
+        columnas = {clave: nombres[idx] for clave, idx in COLUMNAS_REQUERIDAS.items()}
+        indices = list(COLUMNAS_REQUERIDAS.values())
+        nombres_sel = list(columnas.values())
+        idx_fecha = COLUMNAS_REQUERIDAS['fecha_col']
+
+        bloques = []
+        bloque = []
+        huellas = {}
+        for fila in filas:
+            if len(fila) <= max_idx:
+                fila = tuple(fila) + (None,) * (max_idx + 1 - len(fila))
+            proyectada = tuple(fila[i] for i in indices)
+            dia = _dia_tipado(fila[idx_fecha])
+            # Las filas con fecha sin tipar van bajo '' (anterior a cualquier día)
+            clave_dia = '' if dia is None else str(dia)
+            if clave_dia not in huellas:
+                huellas[clave_dia] = hashlib.blake2b(digest_size=16)
+            huellas[clave_dia].update(repr(proyectada).encode('utf-8'))
+            if desde is not None and dia is not None and dia < desde:
+                continue
+            bloque.append(proyectada)
+            if len(bloque) >= tamano_bloque:
+                bloques.append(pd.DataFrame(bloque, columns=nombres_sel, dtype=object))
+                bloque = []
+        if bloque or not bloques:
+            bloques.append(pd.DataFrame(bloque, columns=nombres_sel, dtype=object))
+    except LayoutInesperado:
+        raise
+    except Exception as e:
+        # Celdas o XML que openpyxl no logra recorrer: se intenta con pd.read_excel
+        raise LayoutInesperado(f"Error al recorrer la hoja: {e}") from e
+    finally:
+        libro.close()
+
+    df = pd.concat(bloques, ignore_index=True) if len(bloques) > 1 else bloques[0]
+    df.attrs['huellas_dia'] = {dia: h.hexdigest() for dia, h in sorted(huellas.items())}
+    return df, columnas
+
+def leer_excel(contenido, desde=None, hoja=None):
+    """Lee el libro en modo streaming, con ``pd.read_excel`` como respaldo.
+
+    Devuelve ``(df, columnas)`` sin limpiar. ``desde`` solo es una
+    optimización del lector streaming: el respaldo devuelve todas las filas.
+    """
+    try:
+        return leer_excel_streaming(contenido, desde=desde, hoja=hoja)
+    except LayoutInesperado:
+        df = pd.read_excel(io.BytesIO(contenido), sheet_name=0 if hoja is None else hoja)
+        return df, resolver_columnas(df)
+
+def cargar_excel(contenido, hoja=None):
+    """Lee y limpia un libro Excel (una hoja) a partir de sus bytes."""
+    with tramo("ingesta: lectura excel"):
+        df, columnas = leer_excel(contenido, hoja=hoja)
+    return limpiar_dataframe(df, columnas)
+
+
+# --- CACHÉ EN MEMORIA ---
+
+def tamano_dataframe(df):
+    """Estima la memoria ocupada por un DataFrame en bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class CacheLRU:
+    """Caché LRU acotada por número de entradas y presupuesto de memoria."""
+
+    def __init__(self, max_entradas=8, max_bytes=512 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        """Devuelve el valor cacheado o ``None``, marcándolo como reciente."""
+        with self._lock:
+            if clave not in self._entradas:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return self._entradas[clave][0]
+
+    def guardar(self, clave, valor, tamano):
+        """Inserta un valor y desaloja los menos recientes si se excede el límite."""
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._bytes -= self._entradas.pop(clave)[1]
+            self._entradas[clave] = (valor, tamano)
+            self._bytes += tamano
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, tamano_desalojado) = self._entradas.popitem(last=False)
+                self._bytes -= tamano_desalojado
+                self.desalojos += 1
+
+    def limpiar(self):
+        """Vacía la caché sin reiniciar los contadores."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Resumen de contadores para el panel de depuración."""
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "entradas": len(self._entradas),
+                "memoria_mb": round(self._bytes / (1024 * 1024), 2),
+                "presupuesto_mb": round(self.max_bytes / (1024 * 1024), 2),
+            }
+
+
+# --- CACHÉ EN DISCO ---
+
+class CacheDisco:
+    """Caché columnar (Feather) de DataFrames limpios, con tope de tamaño.
+
+    Cada entrada se guarda como ``<hash>_v<VERSION_ESQUEMA>.feather`` y se lee
+    con memory-map. Al superar ``max_bytes`` se eliminan primero los archivos
+    más antiguos. Requiere ``pyarrow``; sin él la caché queda deshabilitada.
+    """
+
+    def __init__(self, directorio, max_bytes=1024 * 1024 * 1024):
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        try:
+            import pyarrow.feather  # noqa: F401
+            self.habilitada = True
+        except ImportError:
+            self.habilitada = False
+
+    def ruta(self, clave):
+        return self.directorio / f"{clave}_v{VERSION_ESQUEMA}.feather"
+
+    def leer(self, clave):
+        """Devuelve ``(df, columnas)`` desde disco o ``None`` si no existe."""
+        if not self.habilitada:
+            return None
+        ruta = self.ruta(clave)
+        if not ruta.exists():
+            self.fallos += 1
+            return None
+        from pyarrow import feather
+        try:
+            tabla = feather.read_table(ruta, memory_map=True)
+            columnas = json.loads(tabla.schema.metadata[b'columnas'])
+        except Exception:
+            # Archivo corrupto o incompleto: se descarta y se relee el Excel
+            ruta.unlink(missing_ok=True)
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return tabla.to_pandas(), columnas
+
+    def escribir(self, clave, df, columnas):
+        """Persiste el DataFrame limpio; los errores de escritura se ignoran."""
+        if not self.habilitada:
+            return
+        import pyarrow as pa
+        from pyarrow import feather
+        try:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(tabla.schema.metadata or {})
+            metadata[b'columnas'] = json.dumps(columnas).encode()
+            tabla = tabla.replace_schema_metadata(metadata)
+            ruta = self.ruta(clave)
+            ruta_tmp = ruta.with_suffix('.tmp')
+            # Sin compresión para que la lectura con memory-map no copie datos
+            feather.write_feather(tabla, ruta_tmp, compression='uncompressed')
+            os.replace(ruta_tmp, ruta)
+        except Exception:
+            return
+        self._desalojar()
+
+    def _archivos(self):
+        if not self.directorio.exists():
+            return []
+        return sorted(self.directorio.glob('*.feather'), key=lambda r: r.stat().st_mtime)
+
+    def _desalojar(self):
+        archivos = self._archivos()
+        total = sum(r.stat().st_size for r in archivos)
+        while archivos and total > self.max_bytes:
+            ruta = archivos.pop(0)
+            total -= ruta.stat().st_size
+            ruta.unlink(missing_ok=True)
+            self.desalojos += 1
+
+    def estadisticas(self):
+        """Resumen de contadores para el panel de depuración."""
+        archivos = self._archivos()
+        return {
+            "habilitada": self.habilitada,
+            "directorio": str(self.directorio),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "archivos": len(archivos),
+            "disco_mb": round(sum(r.stat().st_size for r in archivos) / (1024 * 1024), 2),
+            "tope_mb": round(self.max_bytes / (1024 * 1024), 2),
+        }
+
+
+DIRECTORIO_CACHE = os.environ.get(
+    "DASHBOARD_CACHE_DIR", str(Path(tempfile.gettempdir()) / "dashboard_equipos_cache"))
+
+CACHE_INGESTA = CacheLRU()
+CACHE_DISCO = CacheDisco(DIRECTORIO_CACHE)
+
+def _resultado_desde_limpio(df, columnas):
+    """Arma la tupla cacheada: DataFrame, columnas, cubo, índice diario y agregado."""
+    with tramo("ingesta: cubo e índice"):
+        cubo = construir_cubo(df, columnas)
+        indice = IndiceDiario(cubo, columnas['fecha_col'])
+    return (df, columnas, cubo, indice, AgregadoDiario(indice, columnas))
+
+def _guardar_resultado(cache, clave, resultado):
+    cache.guardar(clave, resultado, tamano_dataframe(resultado[0]) + tamano_dataframe(resultado[2]))
+
+def cargar_excel_cacheado(contenido, cache=CACHE_INGESTA, cache_disco=CACHE_DISCO):
+    """Como ``cargar_excel`` pero reutiliza resultados ya procesados.
+
+    Busca primero en memoria, luego en la caché en disco y, por último, lee el
+    Excel. El cubo de conteos, su índice por día y el agregado diario se
+    construyen una sola vez por archivo y quedan en la caché en memoria junto
+    al DataFrame. Devuelve un ``ResultadoCarga`` con
+    el origen (``memoria``, ``disco`` o ``excel``) y el tiempo de carga. Los
+    DataFrames son compartidos entre ejecuciones y no deben modificarse en
+    sitio.
+    """
+    inicio = time.perf_counter()
+    clave = hash_contenido(contenido)
+    resultado = cache.obtener(clave)
+    origen = 'memoria'
+    if resultado is None:
+        limpio = cache_disco.leer(clave) if cache_disco is not None else None
+        origen = 'disco'
+        if limpio is None:
+            limpio = cargar_excel(contenido)
+            origen = 'excel'
+            if cache_disco is not None:
+                cache_disco.escribir(clave, *limpio)
+        resultado = _resultado_desde_limpio(*limpio)
+        _guardar_resultado(cache, clave, resultado)
+    return ResultadoCarga(*resultado, origen, time.perf_counter() - inicio)
+
+
+# --- CARGA INCREMENTAL ---
+
+def _concatenar(partes, columnas):
+    """Concatena DataFrames limpios unificando las categorías de empresa y destino."""
+    df = pd.concat(partes, ignore_index=True)
+    for clave in ('empresa_col', 'destino_col'):
+        col = columnas[clave]
+        df[col] = union_categoricals([parte[col] for parte in partes], sort_categories=True)
+    df.attrs['descartadas'] = {campo: sum(parte.attrs.get('descartadas', {}).get(campo, 0) for parte in partes)
+                               for campo in ('fecha', 'hora')}
+    # Las huellas y los descartes por día describen un solo libro; quien concatena los fija si corresponde
+    df.attrs.pop('huellas_dia', None)
+    df.attrs.pop('descartadas_dia', None)
+    return df
+
+def _descartadas_incremental(df_base, nuevos, corte):
+    """``(descartadas, descartadas_dia)`` de la versión combinada, como en una carga completa.
+
+    ``nuevos`` releyó todas las fechas en texto (y por lo tanto todas las no
+    reconocidas); de la base solo se toman las horas descartadas antes del corte.
+    """
+    corte = str(corte)
+    base_dia = df_base.attrs['descartadas_dia']
+    nuevos_dia = nuevos.attrs['descartadas_dia']
+    descartadas = dict(nuevos.attrs['descartadas'])
+    descartadas['hora'] += (sum(n for dia, n in base_dia.items() if dia < corte) -
+                            sum(n for dia, n in nuevos_dia.items() if dia < corte))
+    por_dia = {dia: n for dia, n in base_dia.items() if dia < corte}
+    por_dia.update((dia, n) for dia, n in nuevos_dia.items() if dia >= corte)
+    return descartadas, por_dia
+
+def cargar_excel_incremental(contenido, nombre, versiones, cache=CACHE_INGESTA, cache_disco=CACHE_DISCO):
+    """Carga una nueva versión de un libro que crece día a día y devuelve un ``ResultadoCarga``.
+
+    ``versiones`` (``nombre -> hash``, uno por sesión) indica la versión
+    anterior. Si sigue en memoria y ``mismo_prefijo`` lo confirma, solo se
+    procesan las filas desde su último día; si no, es ``cargar_excel_cacheado``.
+    """
+    inicio = time.perf_counter()
+    clave = hash_contenido(contenido)
+    base = None
+    clave_base = versiones.get(nombre)
+    versiones[nombre] = clave
+    if clave_base is not None and clave_base != clave:
+        base = cache.obtener(clave_base)
+    if base is None or not base[3].fechas or not {'huellas_dia', 'descartadas_dia'} <= base[0].attrs.keys():
+        return cargar_excel_cacheado(contenido, cache, cache_disco)
+
+    df_base, columnas, cubo_base, indice_base, _ = base
+    corte = indice_base.ultima
+    with tramo("ingesta: lectura excel"):
+        crudo, columnas_nuevas = leer_excel(contenido, desde=corte)
+    huellas = crudo.attrs.get('huellas_dia')
+    if columnas_nuevas != columnas or not mismo_prefijo(df_base.attrs['huellas_dia'], huellas, corte):
+        # Cambió el encabezado o los días anteriores: es otro libro, no una versión más larga
+        return cargar_excel_cacheado(contenido, cache, cache_disco)
+
+    fecha_col = columnas['fecha_col']
+    corte_ts = pd.Timestamp(corte)
+    nuevos, _ = limpiar_dataframe(crudo, columnas)
+    nuevos = nuevos[nuevos[fecha_col] >= corte_ts]
+
+    df = _concatenar([df_base[df_base[fecha_col] < corte_ts], nuevos], columnas)
+    df.attrs['huellas_dia'] = huellas
+    df.attrs['descartadas'], df.attrs['descartadas_dia'] = _descartadas_incremental(df_base, nuevos, corte)
+    with tramo("ingesta: cubo e índice"):
+        cubo = _concatenar([cubo_base[cubo_base[fecha_col] < corte_ts], construir_cubo(nuevos, columnas)], columnas)
+        indice = IndiceDiario(cubo, fecha_col)
+    resultado = (df, columnas, cubo, indice, AgregadoDiario(indice, columnas))
+    _guardar_resultado(cache, clave, resultado)
+    if cache_disco is not None:
+        cache_disco.escribir(clave, df, columnas)
+
+    origen = f"incremental ({len(nuevos)} filas nuevas desde {corte})"
+    return ResultadoCarga(*resultado, origen, time.perf_counter() - inicio)
+
+
+# --- CARGA DE VARIOS ARCHIVOS ---
+
+# ``clave`` identifica el contenido de la parte: el hash del archivo para su
+# primera hoja (la que se lee sin indicar hoja) y un hash del archivo y la hoja
+# para las demás. Se usa para la caché en disco y para guardar en el historial.
+DetalleParte = namedtuple('DetalleParte', 'archivo hoja filas segundos origen error clave')
+
+def _cargar_parte(nombre, contenido, hoja, clave, cache_disco):
+    """Lee y limpia una hoja de un archivo; los errores quedan en el detalle."""
+    inicio = time.perf_counter()
+    try:
+        limpio = cache_disco.leer(clave) if cache_disco is not None else None
+        origen = 'disco'
+        if limpio is None:
+            limpio = cargar_excel(contenido, hoja)
+            origen = 'excel'
+            if cache_disco is not None:
+                cache_disco.escribir(clave, *limpio)
+    except Exception as e:
+        return None, DetalleParte(nombre, hoja, 0, time.perf_counter() - inicio, None, str(e), clave)
+    return limpio, DetalleParte(nombre, hoja, len(limpio[0]), time.perf_counter() - inicio, origen, None, clave)
+
+def cargar_varios_excel(archivos, todas_las_hojas=False, max_hilos=None,
+                        cache=CACHE_INGESTA, cache_disco=CACHE_DISCO):
+    """Carga varios libros (y opcionalmente todas sus hojas) en un pool de hilos.
+
+    ``archivos`` es una lista de ``(nombre, contenido)``. Cada archivo u hoja
+    se lee y limpia por separado con las mismas reglas de normalización, y
+    los resultados se concatenan una sola vez; las columnas de cada parte se
+    renombran a las de la primera que se cargó bien. Devuelve
+    ``(ResultadoCarga, detalles)`` con un ``DetalleParte`` por archivo u hoja
+    (filas, segundos y error, si lo hubo): el fallo de una parte no impide
+    cargar las demás. Lanza ``ErrorIngesta`` si ninguna parte se pudo cargar.
+    """
+    inicio = time.perf_counter()
+    hashes = [hash_contenido(contenido) for _, contenido in archivos]
+    clave = ('varios', todas_las_hojas) + tuple(hashes)
+    guardado = cache.obtener(clave)
+    if guardado is not None:
+        resultado, detalles = guardado
+        return ResultadoCarga(*resultado, 'memoria', time.perf_counter() - inicio), detalles
+
+    partes = []
+    detalles = []
+    for (nombre, contenido), hash_archivo in zip(archivos, hashes):
+        if not todas_las_hojas:
+            partes.append((nombre, contenido, None, hash_archivo))
+            continue
+        try:
+            hojas = hojas_libro(contenido)
+        except ErrorIngesta as e:
+            detalles.append(DetalleParte(nombre, None, 0, 0.0, None, str(e), None))
+            continue
+        partes.extend((nombre, contenido, hoja, hash_archivo if i == 0 else
+                       hashlib.sha256(f"{hash_archivo}|{hoja}".encode('utf-8')).hexdigest())
+                      for i, hoja in enumerate(hojas))
+
+    with ThreadPoolExecutor(max_workers=max_hilos) as pool:
+        cargadas = list(pool.map(lambda parte: _cargar_parte(*parte, cache_disco), partes))
+
+    limpios = []
+    for limpio, detalle in cargadas:
+        detalles.append(detalle)
+        if limpio is not None:
+            limpios.append(limpio)
+    if not limpios:
+        errores = "; ".join(f"{d.archivo}{f' [{d.hoja}]' if d.hoja else ''}: {d.error}" for d in detalles)
+        raise ErrorIngesta(f"No se pudo cargar ningún archivo. {errores}")
+
+    columnas = limpios[0][1]
+    dfs = [df.rename(columns={cols[k]: columnas[k] for k in columnas}) for df, cols in limpios]
+    df = _concatenar(dfs, columnas) if len(dfs) > 1 else dfs[0]
+    resultado = _resultado_desde_limpio(df, columnas)
+    cache.guardar(clave, (resultado, detalles), tamano_dataframe(resultado[0]) + tamano_dataframe(resultado[2]))
+
+    origen = f"{len(limpios)} de {len(detalles)} archivos/hojas"
+    return ResultadoCarga(*resultado, origen, time.perf_counter() - inicio), detalles
+
+def partes_carga(carga, detalles):
+    """Divide el DataFrame de ``cargar_varios_excel`` en las partes que lo forman.
+
+    Devuelve una lista de ``(detalle, df)`` con las partes cargadas bien, en
+    el orden en que se concatenaron, para guardar cada archivo u hoja en el
+    historial con su propia ``clave``.
+    """
+    partes = []
+    desde = 0
+    for detalle in detalles:
+        if detalle.error is None:
+            partes.append((detalle, carga.df.iloc[desde:desde + detalle.filas]))
+            desde += detalle.filas
+    return partes
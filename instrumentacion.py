@@ -0,0 +1,173 @@
+"""Medición de tiempos por etapa, memoria pico y perfilado opcional."""
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Ruta donde volcar un .prof en cada ejecución (activa cProfile sin tocar la interfaz)
+RUTA_PERFIL_ENV = os.environ.get("DASHBOARD_PERFIL")
+
+MUESTRAS_POR_TRAMO = 500
+
+
+def _percentil(valores, q):
+    """Percentil ``q`` (0-100) por rango más cercano sobre valores ya ordenados."""
+    return valores[min(len(valores) - 1, int(round(q / 100 * (len(valores) - 1))))]
+
+
+class Medidor:
+    """Acumula duraciones por tramo entre ejecuciones del script.
+
+    Cada ``tramo`` guarda su duración en una ventana de las últimas
+    ``MUESTRAS_POR_TRAMO`` muestras; ``estadisticas`` resume esas ventanas en
+    p50/p95. Es seguro usarlo desde los hilos de la carga en paralelo. La
+    memoria pico (``tracemalloc``) y cProfile solo se activan cuando se piden
+    en ``iniciar_ejecucion``, porque ambos agregan sobrecosto.
+    """
+
+    def __init__(self, max_muestras=MUESTRAS_POR_TRAMO):
+        self.max_muestras = max_muestras
+        self.muestras = OrderedDict()
+        self.memoria_pico = deque(maxlen=max_muestras)
+        self.ultimo_perfil = None
+        self.ultimo_perfil_texto = None
+        self._lock = threading.Lock()
+        self._midiendo_memoria = False
+        # Estado de la ejecución en curso, por hilo (Streamlit usa un hilo por sesión)
+        self._local = threading.local()
+
+    def registrar(self, nombre, segundos):
+        with self._lock:
+            if nombre not in self.muestras:
+                self.muestras[nombre] = deque(maxlen=self.max_muestras)
+            self.muestras[nombre].append(segundos)
+
+    @contextmanager
+    def tramo(self, nombre):
+        """Mide el bloque ``with`` y lo registra bajo ``nombre``, aunque falle."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio)
+
+    # --- CICLO DE UNA EJECUCIÓN ---
+
+    def iniciar_ejecucion(self, memoria=False, perfilar=False):
+        """Marca el inicio de una ejecución del script.
+
+        Si la ejecución anterior de este hilo no llegó a ``terminar_ejecucion``
+        (por ejemplo por ``st.stop()``), su perfilador se descarta.
+        """
+        perfil_previo = getattr(self._local, 'perfil', None)
+        if perfil_previo is not None:
+            perfil_previo.disable()
+        self._local.inicio = time.perf_counter()
+        self._local.perfil = None
+        if memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._midiendo_memoria = True
+        elif self._midiendo_memoria:
+            tracemalloc.stop()
+            self._midiendo_memoria = False
+        if perfilar or RUTA_PERFIL_ENV:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:
+                # Otra sesión ya está perfilando; solo puede haber un perfilador activo
+                return
+            self._local.perfil = perfil
+
+    def terminar_ejecucion(self):
+        """Cierra la ejecución: tiempo total, memoria pico y volcado de cProfile."""
+        perfil = getattr(self._local, 'perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            self._local.perfil = None
+            self._guardar_perfil(perfil)
+        if self._midiendo_memoria and tracemalloc.is_tracing():
+            _, pico = tracemalloc.get_traced_memory()
+            with self._lock:
+                self.memoria_pico.append(pico)
+        inicio = getattr(self._local, 'inicio', None)
+        if inicio is not None:
+            self.registrar("ejecución completa", time.perf_counter() - inicio)
+            self._local.inicio = None
+
+    def _guardar_perfil(self, perfil):
+        with tempfile.NamedTemporaryFile(suffix=".prof", delete=False) as tmp:
+            ruta = tmp.name
+        try:
+            perfil.dump_stats(ruta)
+            with open(ruta, "rb") as f:
+                self.ultimo_perfil = f.read()
+        finally:
+            os.remove(ruta)
+        if RUTA_PERFIL_ENV:
+            with open(RUTA_PERFIL_ENV, "wb") as f:
+                f.write(self.ultimo_perfil)
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(30)
+        self.ultimo_perfil_texto = texto.getvalue()
+
+    # --- RESULTADOS ---
+
+    def estadisticas(self):
+        """Una fila por tramo con n, p50, p95 y último (ms) y el total acumulado (s)."""
+        with self._lock:
+            copias = [(nombre, list(valores)) for nombre, valores in self.muestras.items()]
+        filas = []
+        for nombre, valores in copias:
+            ordenados = sorted(valores)
+            filas.append({
+                "tramo": nombre,
+                "n": len(valores),
+                "p50_ms": round(1000 * _percentil(ordenados, 50), 2),
+                "p95_ms": round(1000 * _percentil(ordenados, 95), 2),
+                "ultimo_ms": round(1000 * valores[-1], 2),
+                "total_s": round(sum(valores), 3),
+            })
+        return filas
+
+    def memoria(self):
+        """Memoria pico de la última ejecución y p95 entre ejecuciones, en MB."""
+        with self._lock:
+            picos = sorted(self.memoria_pico)
+            ultimo = self.memoria_pico[-1] if self.memoria_pico else None
+        if not picos:
+            return None
+        return {
+            "ejecuciones": len(picos),
+            "pico_ultima_mb": round(ultimo / 1024 / 1024, 1),
+            "pico_p95_mb": round(_percentil(picos, 95) / 1024 / 1024, 1),
+        }
+
+    def exportar_json(self):
+        """Resumen y muestras crudas en JSON, para comparar entre versiones."""
+        with self._lock:
+            muestras = {nombre: list(valores) for nombre, valores in self.muestras.items()}
+        return json.dumps({
+            "generado_en": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "tramos": self.estadisticas(),
+            "memoria": self.memoria(),
+            "muestras_s": muestras,
+        }, ensure_ascii=False, indent=2)
+
+    def limpiar(self):
+        with self._lock:
+            self.muestras.clear()
+            self.memoria_pico.clear()
+
+
+MEDIDOR = Medidor()
+tramo = MEDIDOR.tramo
@@ -0,0 +1,305 @@
+"""Motor de reportes sin Streamlit: carga → filtro → agregación → PDF.
+
+Lo usan el dashboard (vistas por empresa) y la línea de comandos para
+generar los reportes de todas las empresas sin interfaz, por ejemplo en
+una tarea nocturna:
+
+    python motor.py despacho.xlsx --fecha 2024-01-05 --salida reportes/
+    python motor.py despacho.xlsx --desde 2024-01-01 --hasta 2024-01-07 \
+        --estadistica Promedio --empresas "M&Q SPA,AG SERVICES SPA" --zip
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+import pandas as pd
+
+import agregacion
+import ingesta
+import reportes
+from instrumentacion import tramo
+from normalizacion import normalizar_destino, normalizar_nombre_empresa
+
+VistaEmpresa = namedtuple('VistaEmpresa', 'empresa resumen fig tabla precision')
+
+
+@lru_cache(maxsize=None)
+def plotly_express():
+    """Importa Plotly Express recién al construir el primer gráfico y fija su tema."""
+    import plotly.express as px
+    import plotly.io as pio
+
+    # Forzar tema de color en Plotly
+    pio.templates.default = "plotly"
+    return px
+
+
+def cubo_periodo(carga, desde, hasta=None):
+    """Filas del cubo de un día o de un rango de días."""
+    if hasta is None:
+        return carga.indice.dia(desde)
+    return carga.indice.rango(desde, hasta)
+
+def etiqueta_periodo(desde, hasta=None):
+    return str(desde) if hasta is None else f"{desde} a {hasta}"
+
+def vista_empresa(carga, cubo_filtrado, empresa, desde, hasta=None, estadistica='Suma', percentil=90,
+                  destinos=None, hora_rango=(0, 23), superponer_dias=False):
+    """Gráfico y tabla de una empresa a partir del cubo ya filtrado.
+
+    Con ``hasta=None`` es la vista de un día; con un rango los días se
+    combinan con ``estadistica`` (ver ``AgregadoDiario.perfil``). ``fig`` y
+    ``tabla`` quedan en ``None`` cuando no hay datos para graficar o tabular.
+    """
+    columnas = carga.columnas
+    empresa_normalizada = normalizar_nombre_empresa(empresa)
+    etiqueta = etiqueta_periodo(desde, hasta)
+    with tramo("motor: vista por empresa"):
+        cubo_empresa = cubo_filtrado[cubo_filtrado[columnas['empresa_col']] == empresa_normalizada]
+        if hasta is None:
+            resumen = agregacion.resumen_por_hora(cubo_empresa, columnas)
+            titulo = f"Equipos por hora - {empresa}"
+        else:
+            resumen = carga.agregado.perfil(empresa_normalizada, desde, hasta, estadistica, percentil,
+                                            destinos, hora_rango)
+            titulo = f"Equipos por hora ({estadistica.lower()}, {etiqueta}) - {empresa}"
+
+        fig = None
+        if not resumen.empty:
+            px = plotly_express()
+            if hasta is not None and superponer_dias:
+                por_dia = carga.agregado.por_dia(empresa_normalizada, desde, hasta, destinos, hora_rango)
+                fig = px.line(por_dia, x=columnas['hora_col'], y="Cantidad", color=columnas['fecha_col'],
+                              markers=True, title=f"Equipos por hora y día ({etiqueta}) - {empresa}")
+            else:
+                fig = px.line(resumen, x=columnas['hora_col'], y="Cantidad", color=columnas['destino_col'],
+                              markers=True, title=titulo)
+
+        tabla = None
+        if not resumen.empty:
+            tabla = agregacion.tabla_por_hora(cubo_empresa if hasta is None else resumen, columnas, hora_rango)
+    precision = 0 if hasta is None or estadistica == 'Suma' else 1
+    return VistaEmpresa(empresa, resumen, fig, tabla, precision)
+
+def resumen_compacto(carga, cubo_filtrado, empresas, desde, hasta=None, estadistica='Suma', percentil=90,
+                     destinos=None, hora_rango=(0, 23)):
+    """Conteo por empresa, hora y destino de todas las ``empresas`` en un solo DataFrame.
+
+    Son los mismos valores que ``vista_empresa`` pone en cada gráfico: el día
+    sale de una sola agrupación del cubo y el rango, de ``AgregadoDiario``.
+    """
+    columnas = carga.columnas
+    empresa_col = columnas['empresa_col']
+    if hasta is None:
+        resumen = cubo_filtrado.groupby([empresa_col, columnas['hora_col'], columnas['destino_col']],
+                                        observed=True)[agregacion.COLUMNA_CANTIDAD].sum().reset_index()
+        resumen[empresa_col] = resumen[empresa_col].astype(object)
+        return resumen
+    partes = []
+    for empresa in empresas:
+        perfil = carga.agregado.perfil(normalizar_nombre_empresa(empresa), desde, hasta, estadistica, percentil,
+                                       destinos, hora_rango)
+        partes.append(perfil.assign(**{empresa_col: empresa}))
+    if not partes:
+        return pd.DataFrame(columns=[empresa_col, columnas['hora_col'], columnas['destino_col'],
+                                     agregacion.COLUMNA_CANTIDAD])
+    return pd.concat(partes, ignore_index=True)
+
+def figura_compacta(resumen, columnas, empresas, titulo, alto_por_empresa=220):
+    """Un solo gráfico WebGL con una faceta por empresa y una línea por destino.
+
+    Cada destino conserva su color en todas las facetas y aparece una sola
+    vez en la leyenda. Devuelve ``None`` si ``resumen`` está vacío.
+    """
+    import plotly.colors
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    if resumen.empty:
+        return None
+    empresa_col = columnas['empresa_col']
+    hora_col = columnas['hora_col']
+    destino_col = columnas['destino_col']
+    empresas = [e for e in empresas if e in set(resumen[empresa_col])]
+    destinos = sorted(resumen[destino_col].astype(str).unique())
+    paleta = plotly.colors.qualitative.Plotly
+    colores = {destino: paleta[i % len(paleta)] for i, destino in enumerate(destinos)}
+    filas = {empresa: i + 1 for i, empresa in enumerate(empresas)}
+
+    fig = make_subplots(rows=len(empresas), cols=1, shared_xaxes=True, subplot_titles=empresas,
+                        vertical_spacing=min(0.08, 0.3 / len(empresas)))
+    # Un recorrido ordenado reparte las series sin filtrar el DataFrame por cada una
+    resumen = resumen.sort_values([empresa_col, destino_col, hora_col])
+    claves = list(zip(resumen[empresa_col], resumen[destino_col].astype(str)))
+    horas = resumen[hora_col].to_numpy()
+    cantidades = resumen[agregacion.COLUMNA_CANTIDAD].to_numpy()
+    en_leyenda = set()
+    inicio = 0
+    for fin in range(1, len(claves) + 1):
+        if fin < len(claves) and claves[fin] == claves[inicio]:
+            continue
+        empresa, destino = claves[inicio]
+        if empresa in filas:
+            fig.add_trace(go.Scattergl(x=horas[inicio:fin], y=cantidades[inicio:fin], name=destino,
+                                       mode="lines+markers", line=dict(color=colores[destino]),
+                                       legendgroup=destino, showlegend=destino not in en_leyenda),
+                          row=filas[empresa], col=1)
+            en_leyenda.add(destino)
+        inicio = fin
+    fig.update_xaxes(dtick=1)
+    fig.update_xaxes(title_text=hora_col, row=len(empresas), col=1)
+    fig.update_layout(title=titulo, height=120 + alto_por_empresa * len(empresas), legend_title_text=destino_col)
+    return fig
+
+def tarea_pdf(vista, etiqueta_fecha):
+    """Argumentos de ``reportes.generar_pdf`` para una vista, o ``None`` si no hay datos."""
+    if vista.fig is None or vista.tabla is None:
+        return None
+    return dict(empresa=vista.empresa, etiqueta_fecha=etiqueta_fecha, fig=vista.fig, tabla_final=vista.tabla,
+                logo_path=reportes.LOGOS.get(normalizar_nombre_empresa(vista.empresa)))
+
+def armar_tareas(carga, desde, hasta=None, empresas=None, destinos=None, hora_rango=(0, 23),
+                 estadistica='Suma', percentil=90):
+    """Tareas de PDF para las empresas pedidas (todas las del periodo si ``empresas`` es ``None``).
+
+    Devuelve ``(tareas, sin_datos)``; ``sin_datos`` lista las empresas que no
+    tienen viajes con esos filtros.
+    """
+    columnas = carga.columnas
+    cubo = cubo_periodo(carga, desde, hasta)
+    if empresas is None:
+        empresas = sorted(cubo[columnas['empresa_col']].unique())
+    empresas = [normalizar_nombre_empresa(e) for e in empresas]
+    if destinos is not None:
+        destinos = [normalizar_destino(d) for d in destinos]
+    cubo_filtrado = agregacion.filtrar_cubo(cubo, columnas, destinos=destinos, empresas=empresas,
+                                            hora_rango=hora_rango)
+
+    etiqueta = etiqueta_periodo(desde, hasta)
+    tareas = []
+    sin_datos = []
+    for empresa in empresas:
+        vista = vista_empresa(carga, cubo_filtrado, empresa, desde, hasta, estadistica, percentil,
+                              destinos, hora_rango)
+        tarea = tarea_pdf(vista, etiqueta)
+        if tarea is None:
+            sin_datos.append(empresa)
+        else:
+            tareas.append(tarea)
+    return tareas, sin_datos
+
+def generar_reportes(archivos, desde, hasta=None, salida=".", empresas=None, destinos=None,
+                     hora_rango=(0, 23), estadistica='Suma', percentil=90, max_procesos=None,
+                     como_zip=False, al_avanzar=None):
+    """Carga los libros, genera un PDF por empresa en paralelo y los escribe en ``salida``.
+
+    ``archivos`` son rutas a libros .xlsx (se concatenan como en una carga
+    múltiple). Devuelve ``(rutas, errores, sin_datos)``.
+    """
+    contenidos = []
+    for ruta in archivos:
+        with open(ruta, "rb") as f:
+            contenidos.append((os.path.basename(ruta), f.read()))
+    carga, detalles = ingesta.cargar_varios_excel(contenidos, cache_disco=None)
+    for d in detalles:
+        if d.error:
+            print(f"Aviso: no se pudo cargar {d.archivo}: {d.error}", file=sys.stderr)
+
+    tareas, sin_datos = armar_tareas(carga, desde, hasta, empresas, destinos, hora_rango, estadistica, percentil)
+    pdfs, errores = reportes.generar_pdfs_en_paralelo(tareas, max_procesos=max_procesos, al_avanzar=al_avanzar)
+
+    os.makedirs(salida, exist_ok=True)
+    if como_zip and pdfs:
+        pdfs = {f"Reportes_{etiqueta_periodo(desde, hasta).replace(' ', '_')}.zip": reportes.empaquetar_zip(pdfs)}
+    rutas = []
+    for nombre, contenido in pdfs.items():
+        ruta = os.path.join(salida, nombre)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        rutas.append(ruta)
+    return rutas, errores, sin_datos
+
+
+# --- LÍNEA DE COMANDOS ---
+
+def _fecha(texto):
+    try:
+        return dt.date.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida (se espera AAAA-MM-DD): {texto}")
+
+def _horas(texto):
+    try:
+        inicio, fin = (int(h) for h in texto.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"rango de horas inválido (se espera H-H): {texto}")
+    if not 0 <= inicio <= fin <= 23:
+        raise argparse.ArgumentTypeError(f"rango de horas fuera de 0-23: {texto}")
+    return inicio, fin
+
+def _percentil(texto):
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"percentil inválido (se espera un entero): {texto}")
+    if not 1 <= valor <= 99:
+        raise argparse.ArgumentTypeError(f"percentil fuera de 1-99: {texto}")
+    return valor
+
+def _lista(texto):
+    return [item.strip() for item in texto.split(",") if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los reportes PDF por empresa sin abrir el dashboard.")
+    parser.add_argument("archivos", nargs="+", help="Libros .xlsx de despacho")
+    periodo = parser.add_mutually_exclusive_group(required=True)
+    periodo.add_argument("--fecha", type=_fecha, help="Día del reporte (AAAA-MM-DD)")
+    periodo.add_argument("--desde", type=_fecha, help="Inicio del rango (con --hasta)")
+    parser.add_argument("--hasta", type=_fecha, help="Fin del rango (inclusive)")
+    parser.add_argument("--empresas", type=_lista, help="Empresas separadas por coma (por defecto, todas)")
+    parser.add_argument("--destinos", type=_lista, help="Destinos separados por coma (por defecto, todos)")
+    parser.add_argument("--horas", type=_horas, default=(0, 23), help="Rango de horas, por ejemplo 6-20")
+    parser.add_argument("--estadistica", choices=agregacion.ESTADISTICAS, default='Suma',
+                        help="Cómo combinar los días de un rango")
+    parser.add_argument("--percentil", type=_percentil, default=90,
+                        help="Percentil (1-99) cuando --estadistica es Percentil")
+    parser.add_argument("--salida", default=".", help="Carpeta donde escribir los PDF")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--zip", action="store_true", help="Escribe un único ZIP con todos los PDF")
+    args = parser.parse_args(argv)
+
+    if args.desde is not None and args.hasta is None:
+        parser.error("--desde requiere --hasta")
+    if args.fecha is not None and args.hasta is not None:
+        parser.error("--hasta solo se usa con --desde")
+    if args.desde is not None and args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+    desde = args.fecha or args.desde
+
+    def al_avanzar(completadas, total, empresa, error):
+        estado = f"error: {error}" if error else "listo"
+        print(f"[{completadas}/{total}] {empresa}: {estado}")
+
+    try:
+        rutas, errores, sin_datos = generar_reportes(
+            args.archivos, desde, args.hasta, args.salida, args.empresas, args.destinos, args.horas,
+            args.estadistica, args.percentil, args.procesos, args.zip, al_avanzar)
+    except (OSError, ingesta.ErrorIngesta) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    for empresa in sin_datos:
+        print(f"Sin datos para {empresa} con los filtros indicados.")
+    if not rutas:
+        print("No se generó ningún reporte: no hay viajes para el periodo y los filtros indicados.",
+              file=sys.stderr)
+        return 1
+    for ruta in rutas:
+        print(ruta)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Reglas de normalización de nombres de empresa y destino."""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Variantes conocidas (ya en mayúsculas, sin puntos y con '&' -> 'AND')
+EQUIVALENCIAS_EMPRESA = {
+    "JORQUERA TRANSPORTE S A": "JORQUERA TRANSPORTE S. A.",
+    "JORQUERA TRANSPORTE SA": "JORQUERA TRANSPORTE S. A.",
+    "MINING SERVICES AND DERIVATES": "M S & D SPA",
+    "MINING SERVICES AND DERIVATES SPA": "M S & D SPA",
+    "M S AND D": "M S & D SPA",
+    "M S AND D SPA": "M S & D SPA",
+    "MSANDD SPA": "M S & D SPA",
+    "M S D": "M S & D SPA",
+    "M S D SPA": "M S & D SPA",
+    "M S & D": "M S & D SPA",
+    "M S & D SPA": "M S & D SPA",
+    "MS&D SPA": "M S & D SPA",
+    "M AND Q SPA": "M&Q SPA",
+    "M AND Q": "M&Q SPA",
+    "M Q SPA": "M&Q SPA",
+    "M & Q": "M&Q SPA",
+    "MQ SPA": "M&Q SPA",
+    "M&Q SPA": "M&Q SPA",
+    "MANDQ SPA": "M&Q SPA",
+    "MINING AND QUARRYING SPA": "M&Q SPA",
+    "MINING AND QUARRYNG SPA": "M&Q SPA",
+    "AG SERVICE SPA": "AG SERVICES SPA",
+    "AG SERVICES SPA": "AG SERVICES SPA",
+    "AG SERVICES": "AG SERVICES SPA",
+    "COSEDUCAM": "COSEDUCAM S A"
+}
+
+VARIANTES_BAQUEDANO = frozenset(["BAQUEDANO/CLB", "BAQUEDANO CLB", "BAQ"])
+
+
+@lru_cache(maxsize=4096)
+def normalizar_nombre_empresa(nombre):
+    """Normaliza nombres de empresa para estandarizar variantes."""
+    nombre = str(nombre).strip().upper()
+    nombre = nombre.replace('.', '').replace('&', 'AND')
+    nombre = ' '.join(nombre.split())
+    return EQUIVALENCIAS_EMPRESA.get(nombre, nombre)
+
+@lru_cache(maxsize=4096)
+def normalizar_destino(destino):
+    """Estandariza variantes de destinos, específicamente Baquedano."""
+    destino = str(destino).strip().upper()
+    # Unifica BAQUEDANO/CLB y otras variantes bajo un solo nombre
+    if destino in VARIANTES_BAQUEDANO:
+        return "BAQUEDANO"
+    return destino
+
+def normalizar_serie(serie, funcion):
+    """Aplica ``funcion`` solo a los valores únicos de ``serie``.
+
+    Devuelve una serie ``category`` con el mismo índice; los nulos se
+    conservan como nulos.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    normalizados = [funcion(valor) for valor in unicos]
+    categorias, codigos_unicos = np.unique(np.array(normalizados, dtype=object), return_inverse=True)
+    codigos_unicos = np.append(codigos_unicos, -1)  # el sentinel -1 indexa el último elemento
+    resultado = pd.Categorical.from_codes(codigos_unicos[codigos], categories=categorias)
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+def normalizar_empresas(serie):
+    """Versión vectorizada de ``normalizar_nombre_empresa``."""
+    return normalizar_serie(serie, normalizar_nombre_empresa)
+
+def normalizar_destinos(serie):
+    """Versión vectorizada de ``normalizar_destino``."""
+    return normalizar_serie(serie, normalizar_destino)
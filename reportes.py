@@ -0,0 +1,433 @@
+"""Generación de reportes PDF por empresa, individual o en lote.
+
+Plotly/Kaleido, Pillow, FPDF y ``multiprocessing`` se importan dentro de
+las funciones que los usan: este módulo se importa al abrir el dashboard y
+esas dependencias solo hacen falta al generar un PDF.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import as_completed
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ingesta import CacheLRU
+from instrumentacion import tramo
+
+CURRENT_DIR = Path(__file__).parent
+LOGOS = {
+    "COSEDUCAM S A": str(CURRENT_DIR / "coseducam.png"),
+    "M&Q SPA": str(CURRENT_DIR / "mq.png"),
+    "M S & D SPA": str(CURRENT_DIR / "msd.png"),
+    "AGRETOC": str(CURRENT_DIR / "agretoc.png"),
+    "JORQUERA TRANSPORTE S. A.": str(CURRENT_DIR / "jorquera.png"),
+    "AG SERVICES SPA": str(CURRENT_DIR / "ag.png")
+}
+BANNER_PATH = str(CURRENT_DIR / "image.png")
+
+
+# --- RENDERIZADO DE GRÁFICOS ---
+
+class RenderizadorGraficos:
+    """Convierte figuras Plotly a PNG con Kaleido, reutilizando renders previos.
+
+    Kaleido 0.2.1 mantiene un proceso de Chromium por intérprete que se lanza
+    en el primer render; ``calentar`` lo inicia por adelantado para que el
+    primer reporte no pague ese arranque. Los PNG se guardan en una caché LRU
+    con clave en el hash de la especificación de la figura (datos, títulos,
+    filtros aplicados) y las dimensiones, de modo que un gráfico sin cambios
+    no se vuelve a renderizar.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.renders = 0
+        self.latencias = deque(maxlen=200)
+        self.segundos_calentamiento = None
+        self._lock = threading.Lock()
+        self._calentando = None
+
+    @staticmethod
+    def clave(fig, width, height, scale):
+        spec = f"{fig.to_json()}|{width}x{height}@{scale}"
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+    def calentar(self):
+        """Inicia el proceso de Kaleido con un render mínimo."""
+        import plotly.graph_objects as go
+        import plotly.io as pio
+
+        inicio = time.perf_counter()
+        pio.to_image(go.Figure(), format='png', width=10, height=10)
+        self.segundos_calentamiento = time.perf_counter() - inicio
+
+    def calentar_en_segundo_plano(self):
+        """Lanza ``calentar`` en un hilo, una sola vez por proceso."""
+        with self._lock:
+            if self._calentando is None:
+                self._calentando = threading.Thread(target=self.calentar, daemon=True)
+                self._calentando.start()
+
+    def renderizar(self, fig, width=900, height=400, scale=2):
+        """Devuelve los bytes PNG de ``fig``, desde la caché si ya se renderizó."""
+        clave = self.clave(fig, width, height, scale)
+        png = self.cache.obtener(clave)
+        if png is None:
+            import plotly.io as pio
+
+            inicio = time.perf_counter()
+            png = pio.to_image(fig, format='png', width=width, height=height, scale=scale)
+            with self._lock:
+                self.renders += 1
+                self.latencias.append(time.perf_counter() - inicio)
+            self.cache.guardar(clave, png, len(png))
+        return png
+
+    def estadisticas(self):
+        """Latencia de render y tasa de aciertos para el panel de diagnóstico."""
+        cache = self.cache.estadisticas()
+        consultas = cache['aciertos'] + cache['fallos']
+        with self._lock:
+            latencias = sorted(self.latencias)
+        return {
+            "renders": self.renders,
+            "aciertos": cache['aciertos'],
+            "fallos": cache['fallos'],
+            "tasa_aciertos": round(cache['aciertos'] / consultas, 3) if consultas else None,
+            "latencia_media_ms": round(1000 * sum(latencias) / len(latencias), 1) if latencias else None,
+            "latencia_p95_ms": round(1000 * latencias[int(0.95 * (len(latencias) - 1))], 1) if latencias else None,
+            "calentamiento_s": (round(self.segundos_calentamiento, 2)
+                                if self.segundos_calentamiento is not None else None),
+            "imagenes_en_cache": cache['entradas'],
+            "memoria_mb": cache['memoria_mb'],
+        }
+
+
+RENDERIZADOR = RenderizadorGraficos(CacheLRU(max_entradas=128, max_bytes=128 * 1024 * 1024))
+
+
+def nombre_archivo(empresa, etiqueta_fecha):
+    """Nombre del PDF descargable para una empresa y fecha (o rango)."""
+    return f"Reporte_{empresa}_{etiqueta_fecha.replace(' ', '_')}.pdf"
+
+# --- RECURSOS GRÁFICOS PREPROCESADOS ---
+
+ANCHO_BASE = 1800
+ANCHO_LOGO = 250
+
+@lru_cache(maxsize=None)
+def banner_preparado(banner_path):
+    """Banner en RGB escalado a ``ANCHO_BASE``; ``None`` si no existe."""
+    if not banner_path or not os.path.exists(banner_path):
+        return None
+    from PIL import Image
+
+    b_img = Image.open(banner_path).convert('RGB')
+    w_perc = ANCHO_BASE / float(b_img.size[0])
+    return b_img.resize((ANCHO_BASE, int(b_img.size[1] * w_perc)), Image.Resampling.LANCZOS)
+
+@lru_cache(maxsize=None)
+def logo_preparado(logo_path):
+    """Logo escalado sobre un lienzo blanco de ``ANCHO_BASE``; ``None`` si no existe."""
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    from PIL import Image
+
+    # Fondo blanco para evitar transparencia negra
+    l_img = Image.open(logo_path).convert('RGBA')
+    l_perc = ANCHO_LOGO / float(l_img.size[0])
+    l_img = l_img.resize((ANCHO_LOGO, int(l_img.size[1] * l_perc)), Image.Resampling.LANCZOS)
+
+    l_canvas = Image.new('RGB', (ANCHO_BASE, l_img.height + 60), (255, 255, 255))
+    l_canvas.paste(l_img, (60, 30), mask=l_img)
+    return l_canvas
+
+def precargar_recursos():
+    """Prepara el banner y los logos de ``LOGOS`` para no procesarlos en cada reporte."""
+    banner_preparado(BANNER_PATH)
+    for logo_path in LOGOS.values():
+        logo_preparado(logo_path)
+
+
+# --- TABLA DEL PDF ---
+
+# Medidas en mm; la tabla ocupa el ancho útil de la página
+ALTO_FILA = 6
+ANCHO_MIN_COLUMNA = 12
+ANCHO_MAX_COLUMNA = 40
+RELLENO_CELDA = 1.5
+TAMANO_FUENTE_TABLA = 8
+
+
+def _textos_tabla(valores):
+    """Textos de un arreglo de números: enteros sin decimales y el resto con uno."""
+    valores = np.asarray(valores, dtype=float)
+    enteros = np.isfinite(valores) & (valores == np.round(valores))
+    textos_enteros = np.char.mod('%d', np.where(enteros, valores, 0).astype(np.int64))
+    return np.where(enteros, textos_enteros, np.char.mod('%.1f', valores))
+
+def _anchos_texto(pdf, textos):
+    """Ancho impreso de cada texto; solo se mide una vez cada texto distinto."""
+    unicos, inversa = np.unique(textos, return_inverse=True)
+    anchos = np.array([pdf.get_string_width(t) for t in unicos])
+    return anchos[inversa].reshape(np.shape(textos))
+
+def _partir_encabezado(pdf, texto, ancho):
+    """Líneas de ``texto`` que caben en ``ancho``: por palabras y, si una no cabe, por letras."""
+    lineas = []
+    actual = ""
+    for palabra in texto.split():
+        candidata = f"{actual} {palabra}".strip()
+        if pdf.get_string_width(candidata) <= ancho:
+            actual = candidata
+            continue
+        if actual:
+            lineas.append(actual)
+        actual = ""
+        for letra in palabra:
+            if actual and pdf.get_string_width(actual + letra) > ancho:
+                lineas.append(actual)
+                actual = ""
+            actual += letra
+    if actual or not lineas:
+        lineas.append(actual)
+    return lineas
+
+def _bloques_columnas(anchos, ancho_disponible):
+    """Agrupa columnas consecutivas en bloques que caben en ``ancho_disponible``."""
+    bloques = []
+    inicio = 0
+    usado = 0
+    for i, ancho in enumerate(anchos):
+        if i > inicio and usado + ancho > ancho_disponible:
+            bloques.append((inicio, i))
+            inicio, usado = i, 0
+        usado += ancho
+    if len(anchos):
+        bloques.append((inicio, len(anchos)))
+    return bloques
+
+def _geometria_bloque(pdf, anchos, ancho_indice, encabezados, tamano_fuente):
+    """Ancho y límite inferior de la página actual, anchos y bordes de las columnas y encabezados partidos."""
+    ancho_tabla = pdf.epw
+    # Cada bloque ocupa todo el ancho: el sobrante se reparte entre sus columnas
+    anchos_bloque = anchos + (ancho_tabla - ancho_indice - anchos.sum()) / len(anchos)
+    bordes = pdf.l_margin + ancho_indice + np.concatenate([[0], np.cumsum(anchos_bloque)])
+    pdf.set_font("Arial", "B", tamano_fuente)
+    lineas = [_partir_encabezado(pdf, e, a - 2 * RELLENO_CELDA) for e, a in zip(encabezados, anchos_bloque)]
+    alto_encabezado = max(ALTO_FILA, max(len(l) for l in lineas) * tamano_fuente * 0.5 + 2)
+    return ancho_tabla, pdf.h - pdf.b_margin, anchos_bloque, bordes, lineas, alto_encabezado
+
+def escribir_tabla(pdf, tabla, titulo_indice="Hora", tamano_fuente=TAMANO_FUENTE_TABLA):
+    """Escribe ``tabla`` en ``pdf`` desde la posición actual.
+
+    Trabaja sobre el arreglo NumPy de la tabla: los textos y sus anchos se
+    calculan en bloque y cada página se dibuja con una línea por fila y por
+    columna y un ``pdf.text`` por valor, en lugar de un ``pdf.cell`` por
+    celda. Si las columnas no caben en el ancho de la página se reparten en
+    bloques (cada uno repite la columna del índice) y las filas siguen en
+    páginas nuevas repitiendo el encabezado. La fila ``TOTAL`` va en negrita.
+    """
+    etiquetas = np.asarray(tabla.index.astype(str), dtype=object)
+    textos = _textos_tabla(tabla.to_numpy(dtype=float))
+    destacadas = etiquetas == 'TOTAL'
+    encabezados = [str(c) for c in tabla.columns]
+
+    pdf.set_font("Arial", "", tamano_fuente)
+    anchos_valores = _anchos_texto(pdf, textos)
+    anchos_etiquetas = _anchos_texto(pdf, etiquetas.astype(str))
+    pdf.set_font("Arial", "B", tamano_fuente)
+    if destacadas.any():
+        anchos_valores[destacadas] = _anchos_texto(pdf, textos[destacadas])
+        anchos_etiquetas[destacadas] = _anchos_texto(pdf, etiquetas[destacadas].astype(str))
+    # Las columnas se ensanchan hasta la palabra más larga del encabezado, con tope
+    palabras = [max((pdf.get_string_width(p) for p in e.split()), default=0) for e in encabezados]
+    contenido = np.maximum(anchos_valores.max(axis=0, initial=0), np.minimum(palabras, ANCHO_MAX_COLUMNA))
+    anchos = np.maximum(contenido + 2 * RELLENO_CELDA, ANCHO_MIN_COLUMNA)
+    ancho_indice = max(anchos_etiquetas.max(initial=0), pdf.get_string_width(titulo_indice)) + 2 * RELLENO_CELDA
+
+    alto_linea = tamano_fuente * 0.5
+    base = (ALTO_FILA + tamano_fuente * 0.25) / 2
+    x0 = pdf.l_margin
+    for inicio, fin in _bloques_columnas(anchos, pdf.epw - ancho_indice):
+        bloque = (anchos[inicio:fin], ancho_indice, encabezados[inicio:fin], tamano_fuente)
+        fila = 0
+        while fila < len(textos):
+            ancho_tabla, limite, anchos_bloque, bordes, lineas, alto_encabezado = _geometria_bloque(pdf, *bloque)
+            y = pdf.get_y()
+            if y + alto_encabezado + ALTO_FILA > limite:
+                # same=True conserva la orientación de la página actual (el documento es apaisado)
+                pdf.add_page(same=True)
+                ancho_tabla, limite, anchos_bloque, bordes, lineas, alto_encabezado = _geometria_bloque(pdf, *bloque)
+                y = pdf.get_y()
+            filas_pagina = max(1, int((limite - y - alto_encabezado) // ALTO_FILA))
+            hasta = min(len(textos), fila + filas_pagina)
+            ys = y + alto_encabezado + ALTO_FILA * np.arange(hasta - fila + 1)
+
+            # Fondos del encabezado y de las filas destacadas
+            pdf.set_fill_color(240, 240, 240)
+            pdf.rect(x0, y, ancho_tabla, alto_encabezado, style='F')
+            pdf.set_fill_color(245, 245, 245)
+            for k in np.flatnonzero(destacadas[fila:hasta]):
+                pdf.rect(x0, ys[k], ancho_tabla, ALTO_FILA, style='F')
+
+            # Grilla: una línea por fila y por columna
+            for yl in np.concatenate([[y], ys]):
+                pdf.line(x0, yl, x0 + ancho_tabla, yl)
+            for xl in np.concatenate([[x0], bordes]):
+                pdf.line(xl, y, xl, ys[-1])
+
+            # Encabezado, centrado
+            pdf.set_font("Arial", "B", tamano_fuente)
+            pdf.text(x0 + (ancho_indice - pdf.get_string_width(titulo_indice)) / 2,
+                     y + (alto_encabezado + tamano_fuente * 0.25) / 2, titulo_indice)
+            for izq, ancho, texto_lineas in zip(bordes[:-1], anchos_bloque, lineas):
+                y_linea = y + (alto_encabezado - len(texto_lineas) * alto_linea) / 2 + alto_linea * 0.75
+                for linea in texto_lineas:
+                    pdf.text(izq + (ancho - pdf.get_string_width(linea)) / 2, y_linea, linea)
+                    y_linea += alto_linea
+
+            # Valores: primero las filas normales y luego las destacadas, para cambiar de fuente una vez
+            centros = bordes[:-1] + anchos_bloque / 2
+            for negrita in (False, True):
+                filas = np.flatnonzero(destacadas[fila:hasta] == negrita)
+                if not len(filas):
+                    continue
+                pdf.set_font("Arial", "B" if negrita else "", tamano_fuente)
+                xs = centros - anchos_valores[fila + filas, inicio:fin] / 2
+                for k, xs_fila in zip(filas, xs):
+                    yb = ys[k] + base
+                    pdf.text(x0 + RELLENO_CELDA, yb, etiquetas[fila + k])
+                    for x, texto in zip(xs_fila, textos[fila + k, inicio:fin]):
+                        pdf.text(x, yb, texto)
+
+            fila = hasta
+            pdf.set_y(float(ys[-1]))
+        pdf.ln(4)
+
+
+def renderizar_grafico(fig):
+    """PNG del gráfico del reporte, con las dimensiones del PDF y la caché de ``RENDERIZADOR``."""
+    with tramo("reportes: gráfico a png"):
+        return RENDERIZADOR.renderizar(fig, width=900, height=400, scale=2)
+
+def generar_pdf(empresa, etiqueta_fecha, fig, tabla_final, banner_path=BANNER_PATH, logo_path=None,
+                grafico_png=None):
+    """Construye el reporte PDF de una empresa y devuelve sus bytes.
+
+    Si se entrega ``grafico_png`` (ya renderizado) no se usa ``fig``.
+    """
+    from PIL import Image
+    from fpdf import FPDF
+
+    # 1. Gráfico a Imagen
+    if grafico_png is None:
+        grafico_png = renderizar_grafico(fig)
+
+    # 2. Apilar banner, logo y gráfico (los dos primeros ya vienen preprocesados)
+    images_to_stack = [img for img in (banner_preparado(banner_path), logo_preparado(logo_path)) if img is not None]
+
+    g_img = Image.open(io.BytesIO(grafico_png)).convert('RGB')
+    g_perc = ANCHO_BASE / float(g_img.size[0])
+    g_img = g_img.resize((ANCHO_BASE, int(g_img.size[1] * g_perc)), Image.Resampling.LANCZOS)
+    images_to_stack.append(g_img)
+
+    total_h = sum(i.height for i in images_to_stack)
+    combined = Image.new('RGB', (ANCHO_BASE, total_h), (255, 255, 255))
+    y_off = 0
+    for i in images_to_stack:
+        combined.paste(i, (0, y_off))
+        y_off += i.height
+
+    # 3. Construir PDF con FPDF
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, f"Reporte de Equipos - {empresa}", ln=1, align="C")
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 10, f"Fecha: {etiqueta_fecha}", ln=1, align="C")
+
+    # FPDF recibe la imagen en memoria, sin archivo intermedio
+    pdf.image(combined, x=10, y=30, w=277)
+
+    # Página 2: Tabla de Datos
+    pdf.add_page(orientation='P')
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "Detalle por Destino y Horario", ln=1, align="C")
+
+    escribir_tabla(pdf, tabla_final)
+
+    return bytes(pdf.output())
+
+
+# --- GENERACIÓN EN LOTE ---
+
+def _iniciar_proceso():
+    """Inicializador del pool: deja el banner y los logos listos mientras se reparten tareas."""
+    precargar_recursos()
+
+def generar_pdfs_en_paralelo(tareas, max_procesos=None, al_avanzar=None):
+    """Genera varios reportes en un pool de procesos.
+
+    ``tareas`` es una lista de diccionarios con los argumentos de
+    ``generar_pdf`` (una empresa/fecha por tarea). Los gráficos se
+    renderizan en este proceso con ``RENDERIZADOR`` (Kaleido ya caliente y
+    su caché de PNG, que sobrevive entre lotes) y a los procesos solo viajan
+    los bytes del PNG; ahí se arma la imagen compuesta y el PDF. ``al_avanzar``
+    se llama con ``(completadas, total, empresa, error)`` cada vez que
+    termina una tarea. Devuelve ``(pdfs, errores)``: ``{nombre_archivo: bytes}``
+    y ``{empresa: mensaje}``; el fallo de una tarea no detiene a las demás.
+    """
+    pdfs = {}
+    errores = {}
+    if not tareas:
+        return pdfs, errores
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    completadas = 0
+
+    def registrar(tarea, error):
+        nonlocal completadas
+        completadas += 1
+        if error is not None:
+            errores[tarea['empresa']] = error
+        if al_avanzar is not None:
+            al_avanzar(completadas, len(tareas), tarea['empresa'], error)
+
+    # 'spawn' evita heredar los hilos del servidor de Streamlit al hacer fork
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_procesos, mp_context=contexto,
+                             initializer=_iniciar_proceso) as pool:
+        # Cada gráfico se envía apenas está renderizado, mientras los procesos arrancan
+        futuros = {}
+        for tarea in tareas:
+            try:
+                grafico_png = renderizar_grafico(tarea['fig'])
+            except Exception as e:
+                registrar(tarea, str(e))
+                continue
+            futuros[pool.submit(generar_pdf, **dict(tarea, fig=None, grafico_png=grafico_png))] = tarea
+        for futuro in as_completed(futuros):
+            tarea = futuros[futuro]
+            try:
+                pdfs[nombre_archivo(tarea['empresa'], tarea['etiqueta_fecha'])] = futuro.result()
+            except Exception as e:
+                registrar(tarea, str(e))
+            else:
+                registrar(tarea, None)
+    return pdfs, errores
+
+def empaquetar_zip(pdfs):
+    """Empaqueta ``{nombre_archivo: bytes}`` en un ZIP en memoria."""
+    salida = io.BytesIO()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in pdfs.items():
+            zf.writestr(nombre, contenido)
+    return salida.getvalue()
@@ -0,0 +1,32 @@
+"""Utilidades compartidas por las pruebas: libros de despacho mínimos y bases temporales."""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+# Los módulos del dashboard están en la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.sintetico import ENCABEZADO, NUM_COLUMNAS  # noqa: E402
+
+
+def libro_excel(*hojas):
+    """Bytes de un .xlsx con una hoja por lista de filas ``(fecha, destino, empresa, hora)``."""
+    libro = Workbook(write_only=True)
+    for i, filas in enumerate(hojas):
+        hoja = libro.create_sheet(f"Despacho {i + 1}")
+        hoja.append(ENCABEZADO)
+        for fecha, destino, empresa, hora in filas:
+            fila = [None] * NUM_COLUMNAS
+            fila[0], fila[3], fila[11], fila[14] = fecha, destino, empresa, hora
+            hoja.append(fila)
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+
+@pytest.fixture
+def ruta_bd(tmp_path):
+    return str(tmp_path / "historial.db")
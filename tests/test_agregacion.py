@@ -0,0 +1,29 @@
+"""Las vistas derivadas del cubo deben ser idénticas al groupby/pivot fila a fila."""
+import pandas as pd
+import pytest
+
+import agregacion
+import ingesta
+from benchmarks.bench_agregacion import vistas_cubo, vistas_originales
+from benchmarks.sintetico import generar_dataframe
+
+
+@pytest.fixture(scope="module")
+def datos():
+    df, columnas = ingesta.limpiar_dataframe(generar_dataframe(20_000, dias=5, semilla=3))
+    return df, columnas, agregacion.construir_cubo(df, columnas)
+
+
+@pytest.mark.parametrize("dia", [0, 4])
+@pytest.mark.parametrize("hora_rango", [(0, 23), (6, 20), (12, 12)])
+def test_vistas_del_cubo_iguales_a_las_originales(datos, dia, hora_rango):
+    df, columnas, cubo = datos
+    fecha = sorted(df[columnas['fecha_col']].dt.date.unique())[dia]
+    empresas = sorted(df[columnas['empresa_col']].unique())
+
+    esperado = vistas_originales(df, columnas, fecha, empresas, hora_rango)
+    obtenido = vistas_cubo(cubo, columnas, fecha, empresas, hora_rango)
+
+    for empresa in empresas:
+        pd.testing.assert_frame_equal(esperado[empresa][0], obtenido[empresa][0])
+        pd.testing.assert_frame_equal(esperado[empresa][1], obtenido[empresa][1])
@@ -0,0 +1,84 @@
+"""Regresiones del historial SQLite: deduplicación por contenido y versiones incrementales."""
+import datetime as dt
+import sqlite3
+from contextlib import closing
+
+import almacen
+import ingesta
+from conftest import libro_excel
+
+NOMBRE = "despacho.xlsx"
+
+
+def viajes(dias, empresa="M&Q SPA", horas=(8,)):
+    return [(dt.datetime(2024, 1, dia), "SALAR", empresa, dt.time(hora)) for dia in dias for hora in horas]
+
+
+def guardar_incremental(filas, ruta):
+    contenido = libro_excel(filas)
+    df, columnas = ingesta.cargar_excel(contenido)
+    return almacen.guardar_viajes_incremental(df, columnas, ingesta.hash_contenido(contenido), NOMBRE, ruta)
+
+
+def guardados(ruta):
+    with closing(sqlite3.connect(ruta)) as con:
+        return sorted(con.execute("SELECT fecha, empresa, COUNT(*) FROM viajes GROUP BY fecha, empresa"))
+
+
+def test_archivo_homonimo_no_borra_ni_omite_viajes(ruta_bd):
+    guardar_incremental(viajes([1, 5, 7]), ruta_bd)
+    guardar_incremental(viajes([5, 6, 9], empresa="AG SERVICES SPA"), ruta_bd)
+
+    assert guardados(ruta_bd) == [
+        ("2024-01-01", "M&Q SPA", 1),
+        ("2024-01-05", "AG SERVICES SPA", 1), ("2024-01-05", "M&Q SPA", 1),
+        ("2024-01-06", "AG SERVICES SPA", 1),
+        ("2024-01-07", "M&Q SPA", 1),
+        ("2024-01-09", "AG SERVICES SPA", 1),
+    ]
+
+
+def test_version_que_crece_reemplaza_solo_desde_el_corte(ruta_bd):
+    v1 = viajes([1, 2, 3], horas=(1, 2))
+    v2 = v1 + viajes([3, 4], horas=(5,))
+    v3 = v2 + viajes([5], horas=(5,))
+
+    insertadas = [guardar_incremental(v, ruta_bd) for v in (v1, v2, v3)]
+
+    assert insertadas == [6, 4, 2]
+    assert guardados(ruta_bd) == [("2024-01-01", "M&Q SPA", 2), ("2024-01-02", "M&Q SPA", 2),
+                                  ("2024-01-03", "M&Q SPA", 3), ("2024-01-04", "M&Q SPA", 1),
+                                  ("2024-01-05", "M&Q SPA", 1)]
+
+
+def test_ultimo_dia_ausente_no_borra_la_version_anterior(ruta_bd):
+    guardar_incremental(viajes([7]), ruta_bd)
+    guardar_incremental(viajes([9], empresa="AG SERVICES SPA"), ruta_bd)
+
+    assert guardados(ruta_bd) == [("2024-01-07", "M&Q SPA", 1), ("2024-01-09", "AG SERVICES SPA", 1)]
+
+
+def test_archivo_guardado_no_se_duplica_en_un_lote(ruta_bd):
+    a = libro_excel(viajes([1], horas=range(5)), viajes([2], empresa="AG SERVICES SPA"))
+    b = libro_excel(viajes([3], horas=range(3)))
+    df, columnas = ingesta.cargar_excel(a)
+    assert almacen.guardar_viajes(df, columnas, ingesta.hash_contenido(a), "a.xlsx", ruta_bd) == 5
+
+    for todas_las_hojas in (False, True):
+        carga, detalles = ingesta.cargar_varios_excel([("a.xlsx", a), ("b.xlsx", b)],
+                                                      todas_las_hojas=todas_las_hojas,
+                                                      cache=ingesta.CacheLRU(), cache_disco=None)
+        for detalle, parte in ingesta.partes_carga(carga, detalles):
+            almacen.guardar_viajes(parte, carga.columnas, detalle.clave, detalle.archivo, ruta_bd)
+
+    assert guardados(ruta_bd) == [("2024-01-01", "M&Q SPA", 5), ("2024-01-02", "AG SERVICES SPA", 1),
+                                  ("2024-01-03", "M&Q SPA", 3)]
+
+
+def test_base_existente_recibe_la_columna_de_huellas(ruta_bd):
+    with closing(sqlite3.connect(ruta_bd)) as con:
+        con.execute("CREATE TABLE archivos (hash TEXT PRIMARY KEY, nombre TEXT, filas INTEGER NOT NULL, "
+                    "cargado_en TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)")
+
+    with closing(almacen.conectar(ruta_bd)) as con:
+        assert "huellas" in {fila[1] for fila in con.execute("PRAGMA table_info(archivos)")}
@@ -0,0 +1,141 @@
+"""Regresiones de la carga incremental y de la carga por lotes."""
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+import ingesta
+from conftest import libro_excel
+
+NOMBRE = "despacho.xlsx"
+
+
+def viajes(dias, empresa="M&Q SPA", destino="SALAR", mes=1, horas=range(0, 24, 4)):
+    return [(dt.datetime(2024, mes, dia), destino, empresa, dt.time(hora)) for dia in dias for hora in horas]
+
+
+def cargar(contenido, versiones, cache):
+    return ingesta.cargar_excel_incremental(contenido, NOMBRE, versiones, cache=cache, cache_disco=None)
+
+
+@pytest.fixture
+def cache():
+    return ingesta.CacheLRU()
+
+
+def test_version_que_crece_equivale_a_carga_completa(cache):
+    versiones = {}
+    enero = viajes(range(1, 8))
+    cargar(libro_excel(enero), versiones, cache)
+    contenido = libro_excel(enero + viajes([7], horas=[23]) + viajes([8, 9]))
+
+    carga = cargar(contenido, versiones, cache)
+
+    assert carga.origen.startswith("incremental")
+    completo, _ = ingesta.cargar_excel(contenido)
+    pd.testing.assert_frame_equal(carga.df, completo)
+
+
+def test_descartadas_de_la_carga_incremental_iguales_a_carga_completa(cache):
+    versiones = {}
+    enero = viajes(range(1, 8)) + [("no es fecha", "SALAR", "M&Q SPA", dt.time(8)),
+                                   (dt.datetime(2024, 1, 2), "SALAR", "M&Q SPA", "sin hora"),
+                                   ("05/01/2024", "SALAR", "M&Q SPA", "sin hora"),
+                                   (dt.datetime(2024, 1, 7), "SALAR", "M&Q SPA", "sin hora")]
+    cargar(libro_excel(enero), versiones, cache)
+    for dia in (8, 9):
+        enero = enero + viajes([dia]) + [(dt.datetime(2024, 1, dia), "SALAR", "M&Q SPA", "sin hora")]
+        contenido = libro_excel(enero)
+
+        carga = cargar(contenido, versiones, cache)
+
+        assert carga.origen.startswith("incremental")
+        completo, _ = ingesta.cargar_excel(contenido)
+        assert carga.df.attrs['descartadas'] == completo.attrs['descartadas'] == {'fecha': 1, 'hora': 3 + dia - 7}
+        assert carga.df.attrs['descartadas_dia'] == completo.attrs['descartadas_dia']
+
+
+def test_archivo_distinto_con_el_mismo_nombre_se_carga_completo(cache):
+    versiones = {}
+    cargar(libro_excel(viajes(range(1, 8))), versiones, cache)
+    marzo = viajes(range(1, 10), empresa="AG SERVICES SPA", destino="ANGAMOS", mes=3)
+
+    carga = cargar(libro_excel(marzo), versiones, cache)
+
+    assert not carga.origen.startswith("incremental")
+    assert len(carga.df) == len(marzo)
+
+
+def test_dia_anterior_modificado_obliga_a_carga_completa(cache):
+    versiones = {}
+    enero = viajes(range(1, 8))
+    cargar(libro_excel(enero), versiones, cache)
+    corregido = [(fecha, "ANGAMOS", empresa, hora) if fecha.day == 3 else (fecha, destino, empresa, hora)
+                 for fecha, destino, empresa, hora in enero]
+
+    carga = cargar(libro_excel(corregido + viajes([8])), versiones, cache)
+
+    assert not carga.origen.startswith("incremental")
+    dia_3 = carga.df[carga.df[carga.columnas['fecha_col']] == pd.Timestamp(2024, 1, 3)]
+    assert set(dia_3[carga.columnas['destino_col']]) == {"ANGAMOS"}
+
+
+def test_versiones_son_por_sesion(cache):
+    enero = viajes(range(1, 8))
+    cargar(libro_excel(enero), {}, cache)
+
+    carga = cargar(libro_excel(enero + viajes([8])), {}, cache)
+
+    assert not carga.origen.startswith("incremental")
+
+
+@pytest.mark.parametrize("valores, esperado", [
+    ([dt.time(7, 30), dt.time(0, 0), dt.time(23, 59, 59)], [7, 0, 23]),
+    ([dt.datetime(2024, 1, 5, 14, 10)], [14]),
+    ([0.5, 1 / 3, 0.999, 45292.75], [12, 8, 23, 18]),
+    (["07:30", "7:05", "23:59:59", " 08:00:00.5 "], [7, 7, 23, 8]),
+    ([7, 8, 14, 0], [7, 8, 14, 0]),
+    ([7.0, 23.0], [7, 23]),
+])
+def test_extraer_horas_por_tipo(valores, esperado):
+    for serie in (pd.Series(valores), pd.Series(valores, dtype=object)):
+        assert ingesta.extraer_horas(serie).tolist() == esperado
+
+
+def test_extraer_horas_columna_mixta_y_no_reconocidas():
+    serie = pd.Series([dt.time(6, 15), 0.25, "06:45", 6, "25:00", "sin hora", 24, 45292, -0.5, None],
+                      dtype=object)
+
+    horas = ingesta.extraer_horas(serie)
+
+    assert horas[:4].tolist() == [6, 6, 6, 6]
+    assert horas[4:].isna().all()
+
+
+def test_horas_no_reconocidas_se_cuentan_como_descartadas():
+    crudo = pd.DataFrame({"Fecha": [dt.datetime(2024, 1, 1)] * 3, "Destino": "SALAR",
+                          "Empresa": "M&Q SPA", "Hora": [7, 14, 30]})
+    columnas = {'fecha_col': "Fecha", 'destino_col': "Destino", 'empresa_col': "Empresa", 'hora_col': "Hora"}
+
+    df, _ = ingesta.limpiar_dataframe(crudo, columnas)
+
+    assert df["Hora"].tolist() == [7, 14]
+    assert df.attrs['descartadas'] == {'fecha': 0, 'hora': 1}
+
+
+def test_aviso_descartadas_sin_dataframe():
+    assert ingesta.aviso_descartadas(None) is None
+
+
+def test_partes_de_un_lote_usan_la_clave_del_archivo(cache):
+    a = libro_excel(viajes([1]), viajes([2], empresa="AG SERVICES SPA"))
+    b = libro_excel(viajes([3]))
+
+    carga, detalles = ingesta.cargar_varios_excel([("a.xlsx", a), ("b.xlsx", b)], todas_las_hojas=True,
+                                                  cache=cache, cache_disco=None)
+    partes = ingesta.partes_carga(carga, detalles)
+
+    assert [d.clave == ingesta.hash_contenido(c) for d, c in zip(detalles, (a, a, b))] == [True, False, True]
+    assert len({d.clave for d in detalles}) == 3
+    assert [len(df) for _, df in partes] == [d.filas for d in detalles]
+    pd.testing.assert_frame_equal(pd.concat([df for _, df in partes]), carga.df)
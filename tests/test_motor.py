@@ -0,0 +1,42 @@
+"""Validación de argumentos de la línea de comandos y vistas por empresa."""
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+import ingesta
+import motor
+
+COLUMNAS = {'fecha_col': "Fecha", 'destino_col': "Destino", 'empresa_col': "Empresa", 'hora_col': "Hora"}
+
+
+@pytest.mark.parametrize("percentil", ["0", "150", "abc"])
+def test_percentil_fuera_de_rango_sale_por_parser_error(capsys, percentil):
+    with pytest.raises(SystemExit) as salida:
+        motor.main(["despacho.xlsx", "--fecha", "2024-01-01", "--estadistica", "Percentil",
+                    "--percentil", percentil])
+
+    assert salida.value.code == 2
+    assert "--percentil" in capsys.readouterr().err
+
+
+@pytest.fixture
+def carga():
+    # M&Q trabaja los cinco días; AG solo el primero
+    filas = [(dt.datetime(2024, 1, dia), "SALAR", "M&Q SPA", 8) for dia in range(1, 6)]
+    filas.append((dt.datetime(2024, 1, 1), "SALAR", "AG SERVICES SPA", 9))
+    df = pd.DataFrame(filas, columns=list(COLUMNAS.values()))
+    df["Empresa"] = df["Empresa"].astype('category')
+    df["Destino"] = df["Destino"].astype('category')
+    return ingesta.ResultadoCarga(*ingesta._resultado_desde_limpio(df, COLUMNAS), 'memoria', 0)
+
+
+def test_rango_sin_datos_en_el_perfil_no_arma_tabla(carga):
+    desde, hasta = dt.date(2024, 1, 1), dt.date(2024, 1, 5)
+    cubo = motor.cubo_periodo(carga, desde, hasta)
+
+    vacia = motor.vista_empresa(carga, cubo, "AG SERVICES SPA", desde, hasta, 'Percentil', 10)
+    con_datos = motor.vista_empresa(carga, cubo, "M&Q SPA", desde, hasta, 'Percentil', 10)
+
+    assert vacia.resumen.empty and vacia.fig is None and vacia.tabla is None
+    assert con_datos.fig is not None and con_datos.tabla.loc['TOTAL', 'SALAR'] == 1
@@ -0,0 +1,36 @@
+"""La tabla del reporte pagina en vertical y no escribe fuera de la página."""
+import io
+
+import pytest
+from fpdf import FPDF
+from PIL import Image
+
+import reportes
+from benchmarks.bench_tabla_pdf import tabla_sintetica
+
+
+@pytest.fixture(scope="module")
+def grafico_png():
+    salida = io.BytesIO()
+    Image.new('RGB', (900, 400), 'white').save(salida, format='PNG')
+    return salida.getvalue()
+
+
+@pytest.mark.parametrize("filas, destinos", [(24, 5), (48, 30), (168, 30)])
+def test_tabla_en_paginas_verticales_y_dentro_del_margen(monkeypatch, grafico_png, filas, destinos):
+    textos = []
+    text_original = FPDF.text
+
+    def text(pdf, x, y, texto=""):
+        textos.append((pdf.page, pdf.w < pdf.h, y, pdf.h - pdf.b_margin))
+        return text_original(pdf, x, y, texto)
+
+    monkeypatch.setattr(FPDF, "text", text)
+    tabla = tabla_sintetica(filas, destinos, decimales=destinos > 10)
+    reportes.generar_pdf("M&Q SPA", "2024-01-01", None, tabla, banner_path=None, grafico_png=grafico_png)
+
+    # La página 1 es la portada apaisada; la tabla empieza en la 2
+    paginas_tabla = {pagina for pagina, _, _, _ in textos}
+    assert min(paginas_tabla) == 2
+    assert all(vertical for _, vertical, _, _ in textos)
+    assert all(y <= limite for _, _, y, limite in textos)